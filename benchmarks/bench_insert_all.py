@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+"""Compare the chunk serialization of Tabledata.insert_all with the former
+row by row one. No request is sent to BigQuery.
+
+Usage: python benchmarks/bench_insert_all.py [num_rows] [chunksize]
+"""
+import json
+import sys
+import time
+
+from pandas_bigquery.tabledata import Tabledata
+from pandas_bigquery.tests.test_bigquery import make_mixed_dataframe_v2
+
+
+def serialize_per_row(dataframe, chunksize, job_id='job'):
+    # the loop replaced by Tabledata.serialize_rows
+    rows = []
+    for index, row in dataframe.reset_index(drop=True).iterrows():
+        row_dict = dict()
+        row_dict['json'] = json.loads(row.to_json(force_ascii=False,
+                                                  date_unit='s',
+                                                  date_format='iso'))
+        row_dict['insertId'] = job_id + str(index)
+        rows.append(row_dict)
+        if len(rows) % chunksize == 0:
+            rows = []
+
+
+def serialize_per_chunk(dataframe, chunksize, job_id='job'):
+    for start in range(0, len(dataframe), chunksize):
+        Tabledata.serialize_rows(dataframe.iloc[start:start + chunksize],
+                                 job_id, start)
+
+
+def bench(name, func, dataframe, chunksize):
+    start = time.time()
+    func(dataframe, chunksize)
+    elapsed = time.time() - start
+    print('{0:>10}: {1:8.3f}s {2:12,.0f} rows/s'.format(
+        name, elapsed, len(dataframe) / elapsed))
+    return elapsed
+
+
+if __name__ == '__main__':
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    chunksize = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    dataframe = make_mixed_dataframe_v2(num_rows)
+    print('Serializing {0:,} rows in chunks of {1}'.format(num_rows, chunksize))
+    per_row = bench('per-row', serialize_per_row, dataframe, chunksize)
+    per_chunk = bench('per-chunk', serialize_per_chunk, dataframe, chunksize)
+    print('{0:>10}: {1:.1f}x'.format('speedup', per_row / per_chunk))
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""Compare the column-oriented result parser with the former per-cell one.
+
+Usage: python benchmarks/bench_parse_data.py [num_rows]
+"""
+import sys
+import time
+
+import numpy as np
+from pandas import DataFrame
+
+from pandas_bigquery import Bigquery
+
+SCHEMA = {'fields': [{'name': 'bools', 'type': 'BOOLEAN'},
+                     {'name': 'flts', 'type': 'FLOAT'},
+                     {'name': 'ints', 'type': 'INTEGER'},
+                     {'name': 'strs', 'type': 'STRING'},
+                     {'name': 'times', 'type': 'TIMESTAMP'}]}
+
+
+def make_rows(num_rows):
+    rows = []
+    for i in range(num_rows):
+        rows.append({'f': [{'v': 'true' if i % 2 else 'false'},
+                           {'v': repr(np.random.randn())},
+                           {'v': None if i % 100 == 0 else str(i)},
+                           {'v': str(np.random.randint(1, 10))},
+                           {'v': '1.5{0:06d}E9'.format(i % 1000000)}]})
+    return rows
+
+
+def parse_data_per_cell(schema, rows):
+    # the implementation replaced by parsers.ResultBuffer and parsers.convert_column
+    dtype_map = {'FLOAT': np.dtype(float),
+                 'TIMESTAMP': 'M8[ns]'}
+
+    fields = schema['fields']
+    col_types = [field['type'] for field in fields]
+    col_names = [str(field['name']) for field in fields]
+    col_dtypes = [dtype_map.get(field['type'], object) for field in fields]
+    page_array = np.zeros((len(rows),), dtype=list(zip(col_names, col_dtypes)))
+    for row_num, raw_row in enumerate(rows):
+        entries = raw_row.get('f', [])
+        for col_num, field_type in enumerate(col_types):
+            field_value = Bigquery._parse_entry(entries[col_num].get('v', ''),
+                                                field_type)
+            page_array[row_num][col_num] = field_value
+
+    return DataFrame(page_array, columns=col_names)
+
+
+def bench(name, func, rows, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.time()
+        func(SCHEMA, rows)
+        best = min(best, time.time() - start)
+    print('{0:>10}: {1:8.3f}s {2:12,.0f} rows/s'.format(
+        name, best, len(rows) / best))
+    return best
+
+
+if __name__ == '__main__':
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rows = make_rows(num_rows)
+    print('Parsing {0:,} rows'.format(num_rows))
+    per_cell = bench('per-cell', parse_data_per_cell, rows)
+    columnar = bench('columnar', Bigquery._parse_data, rows)
+    print('{0:>10}: {1:.1f}x'.format('speedup', per_cell / columnar))
@@ -1,6 +1,3 @@
-from apiclient.discovery import build
-from oauth2client.service_account import ServiceAccountCredentials
-from httplib2 import Http
 import os
 import logging
 from pandas_bigquery.exceptions import *
@@ -8,12 +5,14 @@ from pandas_bigquery.datasets import Datasets
 from pandas_bigquery.tables import Tables
 from pandas_bigquery.tabledata import Tabledata
 from pandas_bigquery.jobs import Jobs
-from pandas import DataFrame, concat
-from pandas.compat import lzip
+from pandas_bigquery.session import Session
+from pandas_bigquery.streaming import StreamingWriter
+from pandas_bigquery import parsers
 from datetime import datetime
-from random import randint
+from concurrent.futures import ThreadPoolExecutor
+from pandas import DataFrame, to_datetime
 import numpy as np
-from time import sleep
+from time import sleep, time
 
 try:
     from googleapiclient.errors import HttpError
@@ -24,7 +23,8 @@ log = logging.getLogger()
 
 
 class Bigquery:
-    def __init__(self, project_id=os.getenv('BIGQUERY_PROJECT'), private_key_path=os.getenv('BIGQUERY_KEY_PATH')):
+    def __init__(self, project_id=os.getenv('BIGQUERY_PROJECT'), private_key_path=os.getenv('BIGQUERY_KEY_PATH'),
+                 session=None, pool_size=None):
 
         if private_key_path is None:
             raise RuntimeError('Invalid bigquery key path')
@@ -32,41 +32,39 @@ class Bigquery:
         self.project_id = project_id
         self.private_key_path = private_key_path
 
-        credentials = ServiceAccountCredentials.from_json_keyfile_name(
-            private_key_path, ['https://www.googleapis.com/auth/bigquery'])
-
-        http_auth = credentials.authorize(Http())
-        self._service = build('bigquery', 'v2', http=http_auth)
-
         with open(private_key_path) as data_file:
             self.private_key = data_file.read()
 
-        self._tables = Tables(self.project_id, private_key=self.private_key_path)
-        self._datasets = Datasets(self.project_id, private_key=self.private_key_path)
-        self._jobs = Jobs(self.project_id, private_key=self.private_key_path)
-        self._tabledata = Tabledata(self.project_id, private_key=self.private_key_path)
+        # the key is read, the token refreshed and the discovery client built once for all the sub-clients,
+        # a session can also be shared by several Bigquery objects. With a pool_size, every thread shares a
+        # single service sending its requests through a pool of connections, see transport.HttpPool
+        if session is None:
+            session = Session(self.project_id, private_key=self.private_key, pool_size=pool_size)
+        self._session = session
+        self._service = session.service
+
+        self._tables = Tables(self.project_id, private_key=self.private_key_path, session=session)
+        self._datasets = Datasets(self.project_id, private_key=self.private_key_path, session=session)
+        self._jobs = Jobs(self.project_id, private_key=self.private_key_path, session=session)
+        self._tabledata = Tabledata(self.project_id, private_key=self.private_key_path, session=session)
 
     @staticmethod
-    def _parse_data(schema, rows):
+    def _parse_data(schema, rows, dtypes=None, categorical=None, categorical_threshold=None, numeric='float'):
         # see:
         # http://pandas.pydata.org/pandas-docs/dev/missing_data.html
         # #missing-data-casting-rules-and-indexing
-        dtype_map = {'FLOAT': np.dtype(float),
-                     'TIMESTAMP': 'M8[ns]'}
-
-        fields = schema['fields']
-        col_types = [field['type'] for field in fields]
-        col_names = [str(field['name']) for field in fields]
-        col_dtypes = [dtype_map.get(field['type'], object) for field in fields]
-        page_array = np.zeros((len(rows),), dtype=lzip(col_names, col_dtypes))
-        for row_num, raw_row in enumerate(rows):
-            entries = raw_row.get('f', [])
-            for col_num, field_type in enumerate(col_types):
-                field_value = Bigquery._parse_entry(entries[col_num].get('v', ''),
-                                                    field_type)
-                page_array[row_num][col_num] = field_value
-
-        return DataFrame(page_array, columns=col_names)
+        result = parsers.ResultBuffer(schema, len(rows), dtypes, categorical, categorical_threshold, numeric)
+        result.append(rows)
+        return result.to_dataframe()
+
+    @staticmethod
+    def _read_pages(schema, total_rows, pages, **kwargs):
+        # totalRows and the schema are known upfront, pages are written straight
+        # into preallocated typed columns, see parsers.ResultBuffer
+        result = parsers.ResultBuffer(schema, total_rows, **kwargs)
+        for page in pages:
+            result.append(page)
+        return result.to_dataframe()
 
     @staticmethod
     def _parse_entry(field_value, field_type):
@@ -83,6 +81,10 @@ class Bigquery:
             return field_value == 'true'
         return field_value
 
+    @property
+    def session(self):
+        return self._session
+
     @property
     def datasets(self):
         return self._datasets
@@ -120,50 +122,94 @@ class Bigquery:
 
         return self.jobs.query_async(query, configuration=config)
 
-    def query(self, query, dialect='standard', priority='INTERACTIVE', strict=True, **kwargs):
-
-        if Bigquery._check_strict(query, strict):
-            raise Exception('Strict mode error',
-                            "partition reference not found in query, "
-                            "please add a partitiondate, _partitiontime or _table_suffix restriction "
-                            "in the where-clause or set strict = False if you are confident in what you're doing.")
-
-        if dialect not in ('legacy', 'standard'):
-            raise ValueError("'{0}' is not valid for dialect".format(dialect))
+    def query(self, query, dialect='standard', priority='INTERACTIVE', strict=True, max_workers=1, prefetch=2,
+              dtypes=None, categorical=None, categorical_threshold=None, numeric='float', spill_dir=None,
+              spill_threshold=0, **kwargs):
 
-        if priority not in ('BATCH', 'INTERACTIVE'):
-            raise ValueError("'{0}' is not valid for priority".format(dialect))
+        config = Bigquery._query_configuration(query, dialect, priority, strict, **kwargs)
 
-        config = kwargs.get('configuration')
-        if config is not None and 'query' in config:
-            config['query']['priority'] = priority
-        else:
-            config = {
-                'query': {
-                    'priority': priority
-                }
-            }
-        config['query']['useLegacySql'] = dialect == 'legacy'
+        # pages are fetched in the background while the previous ones are parsed
+        schema, total_rows, pages = self.jobs.query_iter(query, max_workers=max_workers, prefetch=prefetch,
+                                                         configuration=config)
+        final_df = Bigquery._read_pages(schema, total_rows, pages, dtypes=dtypes, categorical=categorical,
+                                        categorical_threshold=categorical_threshold, numeric=numeric,
+                                        spill_dir=spill_dir, spill_threshold=spill_threshold)
 
-        schema, pages = self.jobs.query(query, configuration=config)
-        dataframe_list = []
-        while len(pages) > 0:
-            page = pages.pop()
-            dataframe_list.append(Bigquery._parse_data(schema, page))
+        self.jobs.print_elapsed_seconds(
+            'Total time taken',
+            datetime.now().strftime('s.\nFinished at %Y-%m-%d %H:%M:%S.'),
+            0
+        )
 
-        if len(dataframe_list) > 0:
-            final_df = concat(dataframe_list, ignore_index=True)
-        else:
-            final_df = Bigquery._parse_data(schema, [])
+        return final_df
 
-        # cast BOOLEAN and INTEGER columns from object to bool/int
-        # if they dont have any nulls
-        type_map = {'BOOLEAN': bool, 'INTEGER': int}
-        for field in schema['fields']:
-            if field['type'] in type_map and \
-                    final_df[field['name']].notnull().all():
-                final_df[field['name']] = \
-                    final_df[field['name']].astype(type_map[field['type']])
+    def query_iter(self, query, dialect='standard', priority='INTERACTIVE', strict=True, chunksize=None,
+                   max_workers=1, prefetch=2, dtypes=None, numeric='float', **kwargs):
+        """ Run a query and yield the result as a sequence of DataFrames
+
+        Pages are requested and parsed while the generator is consumed, so
+        the memory held is bounded by a few pages rather than the whole
+        result: the page being parsed, up to `prefetch` pages fetched
+        ahead of it, and with max_workers > 1 up to 2 * max_workers page
+        ranges in flight. Set prefetch=0 and max_workers=1 to hold a
+        single page at a time.
+
+        Parameters
+        ----------
+        query : str
+            query to be executed
+        dialect : str
+            'standard' or 'legacy'
+        priority : str
+            'INTERACTIVE' or 'BATCH'
+        strict : boolean
+            require a partition restriction in the query
+        chunksize : int
+            number of rows of each yielded DataFrame, or None to yield one
+            DataFrame per result page
+        max_workers : int
+            number of concurrent page fetchers, see `Jobs.query_iter`
+        prefetch : int
+            number of pages fetched in the background while the current
+            one is parsed, see `Jobs.query_iter`
+        dtypes : str
+            None for NumPy dtypes, or 'nullable' to return INTEGER, BOOLEAN
+            and STRING columns as pandas Int64, boolean and string columns
+        numeric : str
+            'float' or 'decimal', how NUMERIC and BIGNUMERIC columns are
+            returned
+        **kwargs : Arbitrary keyword arguments
+            configuration (dict): query job configuration, see `Jobs.query`
+
+        Yields
+        ------
+        DataFrame
+            The next chunk of results
+        """
+
+        if chunksize is not None and chunksize < 1:
+            raise ValueError("'{0}' is not valid for chunksize".format(chunksize))
+
+        config = Bigquery._query_configuration(query, dialect, priority, strict, **kwargs)
+
+        schema, total_rows, pages = self.jobs.query_iter(query, max_workers=max_workers, prefetch=prefetch,
+                                                         configuration=config)
+
+        buffered_rows = []
+        for page in pages:
+            if chunksize is None:
+                yield Bigquery._parse_data(schema, page, dtypes, numeric=numeric)
+                continue
+
+            buffered_rows.extend(page)
+            num_chunks = len(buffered_rows) // chunksize
+            for chunk in range(num_chunks):
+                yield Bigquery._parse_data(
+                    schema, buffered_rows[chunk * chunksize:(chunk + 1) * chunksize], dtypes, numeric=numeric)
+            buffered_rows = buffered_rows[num_chunks * chunksize:]
+
+        if buffered_rows:
+            yield Bigquery._parse_data(schema, buffered_rows, dtypes, numeric=numeric)
 
         self.jobs.print_elapsed_seconds(
             'Total time taken',
@@ -171,12 +217,106 @@ class Bigquery:
             0
         )
 
-        return final_df
-
-    def upload(self, dataframe, destination_table, if_exists='fail', chunksize=500):
+    def read_table(self, dataset_id, table_id, selected_fields=None, start_index=0, max_rows=None, max_workers=1,
+                   prefetch=2, dtypes=None, categorical=None, categorical_threshold=None, numeric='float',
+                   spill_dir=None, spill_threshold=0):
+        """ Read the rows of a table into a DataFrame without running a query
+
+        Rows are read with the free tabledata.list endpoint (see `Tabledata.list`)
+        and parsed like the results of `query`, which accepts the same
+        dtypes, categorical, categorical_threshold, numeric, spill_dir and
+        spill_threshold parameters.
+
+        Parameters
+        ----------
+        dataset_id : str
+            Name of the BigQuery dataset for the table
+        table_id : str
+            Name of the BigQuery table
+        selected_fields : list(str)
+            Names of the top level fields to read, all fields if None
+        start_index : int
+            Index of the first row to read
+        max_rows : int
+            Maximum number of rows to read, all the remaining rows if None
+        max_workers : int
+            Number of concurrent page fetchers
+        prefetch : int
+            Number of pages fetched in the background while the current
+            one is parsed
+        """
+
+        schema, total_rows, pages = self.tabledata.list(dataset_id, table_id, selected_fields=selected_fields,
+                                                        start_index=start_index, max_rows=max_rows,
+                                                        max_workers=max_workers, prefetch=prefetch)
+
+        return Bigquery._read_pages(schema, total_rows, pages, dtypes=dtypes, categorical=categorical,
+                                    categorical_threshold=categorical_threshold, numeric=numeric,
+                                    spill_dir=spill_dir, spill_threshold=spill_threshold)
+
+    def upload(self, dataframe, destination_table, if_exists='fail', chunksize=10000, max_workers=1, max_bytes=None,
+               method='auto', load_threshold=100000, source_format='NEWLINE_DELIMITED_JSON', max_retries=0,
+               errors='raise', insert_ids=None, checkpoint=None):
+        """ Write a DataFrame to a table or a partition of a table
+
+        Parameters
+        ----------
+        dataframe : DataFrame
+            Rows to be written
+        destination_table : str
+            'datasetId.tableId', or 'datasetId.tableId$YYYYMMDD' to write a partition
+        if_exists : str
+            'fail', 'replace' or 'append', what to do when the table or the partition already exists
+        chunksize : int
+            Maximum number of rows of each insertAll request, see `Tabledata.insert_all`
+        max_workers : int
+            Number of concurrent insertAll requests
+        max_bytes : int
+            Target size of each insertAll request
+        method : str
+            'stream' to write the rows with insertAll, 'load' to write them with a single load job, or 'auto' to
+            use a load job for frames of at least `load_threshold` rows. Load jobs are free and much faster for
+            large frames, and the rows are not held in the streaming buffer.
+        load_threshold : int
+            Minimum number of rows loaded with a load job when method is 'auto'
+        source_format : str
+            Format of the file sent by load jobs, 'NEWLINE_DELIMITED_JSON' or 'PARQUET', see `Jobs.load_dataframe`
+        max_retries : int
+            Number of times streamed rows rejected with a transient error are sent again
+        errors : str
+            'raise' or 'report', what to do with the streamed rows that could not be inserted, see
+            `Tabledata.insert_all`
+        insert_ids : str
+            None, 'hash' or the name of a key column, how the insertId of the streamed rows is built, see
+            `Tabledata.insert_all`
+        checkpoint : str
+            Path of a file recording the streamed rows acknowledged so far, to resume an interrupted upload.
+            It requires insert_ids, so that the rows in flight when the upload stopped are deduplicated. Resuming
+            writes to the table the interrupted upload created, so it needs if_exists='append', and
+            if_exists='replace' is not allowed since it would delete the rows already acknowledged
+
+        Returns
+        -------
+        list(dict)
+            The streamed rows that could not be inserted when errors is 'report', otherwise an empty list
+        """
         if if_exists not in ('fail', 'replace', 'append'):
             raise ValueError("'{0}' is not valid for if_exists".format(if_exists))
 
+        if method not in ('auto', 'stream', 'load'):
+            raise ValueError("'{0}' is not valid for method".format(method))
+
+        if checkpoint is not None and if_exists == 'replace':
+            raise ValueError("checkpoint can't be used with if_exists='replace', "
+                             "resume an upload with if_exists='append'")
+
+        if checkpoint is not None and insert_ids is None:
+            raise ValueError("checkpoint needs deterministic insert_ids, "
+                             "'hash' or the name of a key column")
+
+        if method == 'auto':
+            method = 'load' if len(dataframe) >= load_threshold else 'stream'
+
         if '.' not in destination_table:
             raise NotFoundException(
                 "Invalid Table Name. Should be of the form 'datasetId.tableId' ")
@@ -188,78 +328,22 @@ class Bigquery:
         if Tables.contains_partition_decorator(table_id):
             root_table_id, partition_id = table_id.rsplit('$', 1)
 
-            if not self.tables.exists(dataset_id, root_table_id):
-                self.tables.insert(dataset_id, root_table_id, table_schema, body={'timePartitioning': {'type': 'DAY'}})
-
-            if not self.tables.schema_is_subset(dataset_id,
-                                                root_table_id,
-                                                table_schema):
-                raise InvalidSchema("Please verify that the structure and "
-                                    "data types in the DataFrame match "
-                                    "the schema of the destination table.")
-
-            table_resource = self.tables.get(dataset_id, root_table_id)
-
-            if 'timePartitioning' not in table_resource:
-                raise InvalidSchema("Could not write to the partition because "
-                                    "the table is not partitioned.")
-
-            partition_exists = self.query("SELECT COUNT(*) AS num_rows FROM {0}"
-                                          .format(destination_table),
-                                          strict=False,
-                                          priority='INTERACTIVE',
-                                          dialect='legacy')['num_rows'][0] > 0
-
-            if partition_exists and if_exists == 'fail':
-                raise TableCreationError("Could not create the partition "
-                                         "because it already exists. "
-                                         "Change the if_exists parameter to "
-                                         "append or replace data.")
-
-            if -30 < (datetime.today() - datetime.strptime(partition_id, '%Y%m%d')).days < 360 \
-                    and not (partition_exists and if_exists == 'replace'):
-                self.tabledata.insert_all(dataframe, dataset_id, table_id, chunksize)
-
-            else:
-                write_disposition = 'WRITE_APPEND' if if_exists == 'append' else 'WRITE_TRUNCATE'
-                temporary_table_id = '_'.join(
-                    [root_table_id + '_' + partition_id,
-                     str(randint(1, 100000))])
-                self.tables.insert(dataset_id, temporary_table_id, table_schema)
-
-                try:
-                    self.tabledata.insert_all(dataframe, dataset_id, temporary_table_id,
-                                              chunksize)
-                    sleep(30)  # <- Curses Google!!!
-                    self.jobs.query('select * from {0}.{1}'
-                                    .format(dataset_id, temporary_table_id),
-                                    configuration={
-                                        'query': {
-                                            'destinationTable': {
-                                                'projectId': self.project_id,
-                                                'datasetId': dataset_id,
-                                                'tableId': table_id
-                                            },
-                                            'createDisposition': 'CREATE_IF_NEEDED',
-                                            'writeDisposition': write_disposition,
-                                            'allowLargeResults': True
-                                        }
-                                    })
-                    self.tables.delete(dataset_id, temporary_table_id)
-                except Exception as e:
-                    self.tables.delete(dataset_id, temporary_table_id)
-                    raise e
-
+            self._prepare_partitioned_table(dataset_id, root_table_id, table_schema)
+            return self._write_partition(dataframe, dataset_id, table_id, if_exists, method, source_format,
+                                         chunksize=chunksize, max_workers=max_workers,
+                                         max_bytes=max_bytes, max_retries=max_retries, errors=errors,
+                                         insert_ids=insert_ids, checkpoint=checkpoint)
 
         else:
-            if self.tables.exists(dataset_id, table_id):
+            table_exists = self.tables.exists(dataset_id, table_id)
+            if table_exists:
                 if if_exists == 'fail':
                     raise TableCreationError(
                         "Could not create the table because it "
                         "already exists. "
                         "Change the if_exists parameter to "
                         "append or replace data.")
-                elif if_exists == 'replace':
+                elif if_exists == 'replace' and method == 'stream':
                     self.tables.delete_and_recreate_table(
                         dataset_id, table_id, table_schema)
                 elif if_exists == 'append':
@@ -269,10 +353,223 @@ class Bigquery:
                         raise InvalidSchema("Please verify that the structure and "
                                             "data types in the DataFrame match "
                                             "the schema of the destination table.")
-            else:
+            elif method == 'stream':
                 self.tables.insert(dataset_id, table_id, table_schema)
+            elif not self.datasets.exists(dataset_id):
+                # the load job creates the table, but not its dataset
+                self.datasets.insert(dataset_id)
+
+            if method == 'load':
+                # the load job creates the table, or replaces its rows and schema. Rows appended to an existing
+                # table are loaded with the schema of the table, the frame may only hold some of its columns
+                write_disposition = {'fail': 'WRITE_EMPTY',
+                                     'replace': 'WRITE_TRUNCATE',
+                                     'append': 'WRITE_APPEND'}[if_exists]
+                load_schema = None if table_exists and if_exists == 'append' else table_schema
+                self.jobs.load_dataframe(dataframe, dataset_id, table_id, load_schema,
+                                         write_disposition=write_disposition, source_format=source_format)
+                return []
+
+            return self.tabledata.insert_all(dataframe, dataset_id, table_id, chunksize, max_workers=max_workers,
+                                             max_bytes=max_bytes, max_retries=max_retries, errors=errors,
+                                             insert_ids=insert_ids, checkpoint=checkpoint)
+
+
+    def upload_partitioned(self, dataframe, destination_table, partition_column, if_exists='fail', max_workers=4,
+                           method='auto', load_threshold=100000, source_format='NEWLINE_DELIMITED_JSON',
+                           chunksize=10000, errors='raise'):
+        """ Write a DataFrame to the daily partitions of a table, one partition per day of a date column
+
+        The table is created, or its schema validated, once, and the partitions to be written are checked with
+        batched metadata requests, see `Tables.partition_exists_many`. The partitions are then written
+        concurrently, each one as `upload` would write 'datasetId.tableId$YYYYMMDD'.
+
+        Parameters
+        ----------
+        dataframe : DataFrame
+            Rows to be written
+        destination_table : str
+            'datasetId.tableId' of a DAY partitioned table
+        partition_column : str
+            Name of the date or timestamp column the rows are split by
+        if_exists : str
+            'fail', 'replace' or 'append', what to do with each partition that already exists
+        max_workers : int
+            Number of partitions written concurrently
+        method : str
+            'stream', 'load' or 'auto', chosen for each partition as in `upload`
+        load_threshold : int
+            Minimum number of rows of a partition loaded with a load job when method is 'auto'
+        source_format : str
+            Format of the file sent by load jobs, see `Jobs.load_dataframe`
+        chunksize : int
+            Maximum number of rows of each insertAll request of streamed partitions
+        errors : str
+            'raise' to raise the first error once all the partitions have been attempted, or 'report' to only
+            record the errors in the returned report
+
+        Returns
+        -------
+        DataFrame
+            One row per partition, indexed by partition id, with the number of rows written, the method used,
+            the seconds taken and the error raised, if any
+        """
+        if if_exists not in ('fail', 'replace', 'append'):
+            raise ValueError("'{0}' is not valid for if_exists".format(if_exists))
+
+        if method not in ('auto', 'stream', 'load'):
+            raise ValueError("'{0}' is not valid for method".format(method))
+
+        if errors not in ('raise', 'report'):
+            raise ValueError("'{0}' is not valid for errors".format(errors))
+
+        if '.' not in destination_table or Tables.contains_partition_decorator(destination_table):
+            raise NotFoundException(
+                "Invalid Table Name. Should be of the form 'datasetId.tableId' ")
+
+        dataset_id, table_id = destination_table.rsplit('.', 1)
+
+        partition_dates = to_datetime(dataframe[partition_column])
+        if partition_dates.isnull().any():
+            raise ValueError("'{0}' contains null dates".format(partition_column))
+        partition_ids = partition_dates.dt.strftime('%Y%m%d')
+
+        table_schema = Tables.generate_schema_from_dataframe(dataframe)
+        self._prepare_partitioned_table(dataset_id, table_id, table_schema)
+        # every partition is written once, by a single worker, so the partitions existing when the upload
+        # starts answer the existence checks of the whole upload
+        partition_exists = self.tables.partition_exists_many(
+            dataset_id, [table_id + '$' + partition_id for partition_id in partition_ids.unique()])
+        partitions = set(partition.rsplit('$', 1)[1] for partition, exists in partition_exists.items() if exists)
+
+        def write(partition_id, partition):
+            partition_method = method
+            if partition_method == 'auto':
+                partition_method = 'load' if len(partition) >= load_threshold else 'stream'
+
+            start = time()
+            error = None
+            try:
+                self._write_partition(partition, dataset_id, table_id + '$' + partition_id, if_exists,
+                                      partition_method, source_format, partitions=partitions, chunksize=chunksize)
+            except Exception as ex:
+                error = ex
+            return {'partition_id': partition_id,
+                    'num_rows': len(partition),
+                    'method': partition_method,
+                    'elapsed': time() - start,
+                    'error': error}
+
+        with ThreadPoolExecutor(max_workers) as executor:
+            results = list(executor.map(lambda group: write(*group), dataframe.groupby(partition_ids.values)))
+
+        report = DataFrame(results, columns=['partition_id', 'num_rows', 'method', 'elapsed', 'error'])
+        report = report.set_index('partition_id')
+
+        if errors == 'raise':
+            for error in report['error']:
+                if error is not None:
+                    raise error
+
+        return report
+
+    def streaming_writer(self, destination_table, **kwargs):
+        """ Open a StreamingWriter sending DataFrames to an existing table as they are produced
+
+        Parameters
+        ----------
+        destination_table : str
+            'datasetId.tableId'
+        **kwargs : Arbitrary keyword arguments
+            Passed to `StreamingWriter`, such as batch_rows, linger, max_workers or max_buffer_bytes
+
+        Returns
+        -------
+        StreamingWriter
+            To be closed, or used as a context manager, once every frame has been written
+        """
+        if '.' not in destination_table:
+            raise NotFoundException(
+                "Invalid Table Name. Should be of the form 'datasetId.tableId' ")
+
+        dataset_id, table_id = destination_table.rsplit('.', 1)
+
+        return StreamingWriter(self.tabledata, dataset_id, table_id, **kwargs)
+
+    def _prepare_partitioned_table(self, dataset_id, table_id, table_schema):
+        if not self.tables.exists(dataset_id, table_id):
+            self.tables.insert(dataset_id, table_id, table_schema, body={'timePartitioning': {'type': 'DAY'}})
+
+        if not self.tables.schema_is_subset(dataset_id,
+                                            table_id,
+                                            table_schema):
+            raise InvalidSchema("Please verify that the structure and "
+                                "data types in the DataFrame match "
+                                "the schema of the destination table.")
+
+        table_resource = self.tables.get(dataset_id, table_id)
+
+        if 'timePartitioning' not in table_resource:
+            raise InvalidSchema("Could not write to the partition because "
+                                "the table is not partitioned.")
+
+    def _write_partition(self, dataframe, dataset_id, table_id, if_exists, method, source_format, partitions=None,
+                         **kwargs):
+        root_table_id, partition_id = table_id.rsplit('$', 1)
+
+        if partitions is not None:
+            partition_exists = partition_id in partitions
+        else:
+            partition_exists = self.tables.partition_exists(dataset_id, table_id)
+
+        if partition_exists and if_exists == 'fail':
+            raise TableCreationError("Could not create the partition "
+                                     "because it already exists. "
+                                     "Change the if_exists parameter to "
+                                     "append or replace data.")
+
+        # rows can only be streamed into partitions within the streaming window, partitions outside of
+        # it and replaced ones are written straight through their decorator by a single load job
+        if method == 'stream' \
+                and -30 < (datetime.today() - datetime.strptime(partition_id, '%Y%m%d')).days < 360 \
+                and not (partition_exists and if_exists == 'replace'):
+            dead_letters = self.tabledata.insert_all(dataframe, dataset_id, table_id, **kwargs)
+
+        else:
+            # the partition is loaded with the schema of its table, the frame may only hold some of its columns
+            write_disposition = 'WRITE_TRUNCATE' if if_exists == 'replace' else 'WRITE_APPEND'
+            self.jobs.load_dataframe(dataframe, dataset_id, table_id, write_disposition=write_disposition,
+                                     source_format=source_format)
+            dead_letters = []
+
+        return dead_letters
+
+    @staticmethod
+    def _query_configuration(query, dialect, priority, strict, **kwargs):
+        if Bigquery._check_strict(query, strict):
+            raise Exception('Strict mode error',
+                            "partition reference not found in query, "
+                            "please add a partitiondate, _partitiontime or _table_suffix restriction "
+                            "in the where-clause or set strict = False if you are confident in what you're doing.")
+
+        if dialect not in ('legacy', 'standard'):
+            raise ValueError("'{0}' is not valid for dialect".format(dialect))
+
+        if priority not in ('BATCH', 'INTERACTIVE'):
+            raise ValueError("'{0}' is not valid for priority".format(priority))
+
+        config = kwargs.get('configuration')
+        if config is not None and 'query' in config:
+            config['query']['priority'] = priority
+        else:
+            config = {
+                'query': {
+                    'priority': priority
+                }
+            }
+        config['query']['useLegacySql'] = dialect == 'legacy'
 
-            self.tabledata.insert_all(dataframe, dataset_id, table_id, chunksize)
+        return config
 
     @staticmethod
     def _check_strict(query, strict):
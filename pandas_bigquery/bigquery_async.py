@@ -0,0 +1,516 @@
+from pandas_bigquery.exceptions import *
+from pandas_bigquery.bigquery import Bigquery
+from pandas_bigquery.jobs import Jobs
+from pandas_bigquery.session import Session
+from pandas_bigquery.tabledata import Tabledata
+from pandas_bigquery.tables import Tables
+from pandas_bigquery import parsers
+from functools import partial
+import asyncio
+import json
+import os
+import tempfile
+import uuid
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+class AsyncBigquery(object):
+    """ asyncio counterpart of `Bigquery`
+
+    Requests are sent with aiohttp through a pool of at most `pool_size`
+    connections, so a single event loop can drive many jobs at once
+    without a thread per job. Waiting for a job uses long polling of
+    jobs.getQueryResults or asyncio.sleep, never blocking the loop, and
+    result pages are parsed in the default executor.
+
+    The credentials are loaded once, by a `Session`, and the token is
+    refreshed in the default executor when it expires.
+
+        async with AsyncBigquery(project_id, key_path) as bigquery:
+            df = await bigquery.query('SELECT ...')
+
+    Parameters
+    ----------
+    project_id : str
+        Google BigQuery Account project ID
+    private_key_path : str
+        Path of the service account private key in JSON format
+    session : Session
+        Session providing the credentials, instead of the key
+    pool_size : int
+        Maximum number of open connections
+    """
+
+    api_url = 'https://bigquery.googleapis.com/bigquery/v2'
+    upload_url = 'https://bigquery.googleapis.com/upload/bigquery/v2'
+
+    # Size in bytes of each chunk of a resumable upload, a multiple of 256 KB
+    upload_chunksize = 8 * 2 ** 20
+
+    def __init__(self, project_id=os.getenv('BIGQUERY_PROJECT'), private_key_path=os.getenv('BIGQUERY_KEY_PATH'),
+                 session=None, pool_size=100):
+        if aiohttp is None:
+            raise ImportError("AsyncBigquery requires aiohttp, install it with 'pip install aiohttp'")
+
+        if session is None:
+            if private_key_path is None:
+                raise RuntimeError('Invalid bigquery key path')
+            with open(private_key_path) as data_file:
+                session = Session(project_id, private_key=data_file.read())
+
+        self.project_id = project_id
+        self.pool_size = pool_size
+        self._session = session
+        self._http = None
+        self._refresh_lock = None
+
+        self._tables = AsyncTables(self)
+        self._datasets = AsyncDatasets(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    @property
+    def session(self):
+        return self._session
+
+    @property
+    def tables(self):
+        return self._tables
+
+    @property
+    def datasets(self):
+        return self._datasets
+
+    async def close(self):
+        """ Close the pooled connections """
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+
+    async def query(self, query, dialect='standard', priority='INTERACTIVE', strict=True, dtypes=None,
+                    categorical=None, categorical_threshold=None, numeric='float', **kwargs):
+        """ Run a query and return its result as a DataFrame, see `Bigquery.query` """
+
+        config = Bigquery._query_configuration(query, dialect, priority, strict, **kwargs)
+        job_id = await self._insert_query(query, config)
+
+        reply = await self._query_results(job_id)
+        while not reply.get('jobComplete', False):
+            reply = await self._query_results(job_id)
+
+        loop = asyncio.get_running_loop()
+        result = parsers.ResultBuffer(reply['schema'], int(reply.get('totalRows', 0)), dtypes, categorical,
+                                      categorical_threshold, numeric)
+        while True:
+            if reply.get('rows'):
+                await loop.run_in_executor(None, result.append, reply['rows'])
+            page_token = reply.get('pageToken')
+            if not page_token:
+                break
+            reply = await self._query_results(job_id, pageToken=page_token)
+
+        return await loop.run_in_executor(None, result.to_dataframe)
+
+    async def query_async(self, query, dialect='standard', priority='BATCH', strict=True, **kwargs):
+        """ Start a query job without waiting for it, see `wait`
+
+        Returns
+        -------
+        str
+            The job id
+        """
+
+        config = Bigquery._query_configuration(query, dialect, priority, strict, **kwargs)
+        return await self._insert_query(query, config)
+
+    async def wait(self, job_id, poll_interval=1.):
+        """ Wait for a job to complete
+
+        Parameters
+        ----------
+        job_id : str
+            Id of the job, as returned by `query_async`
+        poll_interval : float
+            Seconds between two checks of the job state
+
+        Returns
+        -------
+        dict
+            The job resource
+        """
+
+        while True:
+            job = await self._request('GET', '/projects/{0}/jobs/{1}'.format(self.project_id, job_id))
+            if job['status']['state'] == 'DONE':
+                break
+            await asyncio.sleep(poll_interval)
+
+        error = job['status'].get('errorResult')
+        if error:
+            raise GenericGBQException(
+                "Reason: {0}, Message: {1}".format(error.get('reason'), error.get('message')))
+
+        return job
+
+    async def upload(self, dataframe, destination_table, if_exists='fail', chunksize=10000, max_in_flight=4,
+                     method='auto', load_threshold=100000):
+        """ Write a DataFrame to a table or a partition of a table
+
+        The table, or the table of the partition, is created and its schema validated as `Bigquery.upload`
+        does. Unlike `Bigquery.upload`:
+
+        - rows are streamed with insertAll, up to `max_in_flight` requests at a time, and the first rows
+          rejected by BigQuery raise StreamingInsertError, there are no retries, dead letters or checkpoints
+        - partitions, as well as tables being replaced, are always written with a load job, a replaced table
+          takes the schema of the frame
+
+        Parameters
+        ----------
+        dataframe : DataFrame
+            Rows to be written
+        destination_table : str
+            'datasetId.tableId', or 'datasetId.tableId$YYYYMMDD' to write a partition
+        if_exists : str
+            'fail', 'replace' or 'append', what to do when the table or the partition already exists
+        chunksize : int
+            Maximum number of rows of each insertAll request
+        max_in_flight : int
+            Number of concurrent insertAll requests
+        method : str
+            'stream', 'load' or 'auto' to use a load job for frames of at least `load_threshold` rows
+        load_threshold : int
+            Minimum number of rows loaded with a load job when method is 'auto'
+
+        Returns
+        -------
+        list
+            Always empty, like the dead letters `Bigquery.upload` returns when errors is 'raise'
+        """
+        if if_exists not in ('fail', 'replace', 'append'):
+            raise ValueError("'{0}' is not valid for if_exists".format(if_exists))
+
+        if method not in ('auto', 'stream', 'load'):
+            raise ValueError("'{0}' is not valid for method".format(method))
+
+        if '.' not in destination_table:
+            raise NotFoundException(
+                "Invalid Table Name. Should be of the form 'datasetId.tableId' ")
+
+        dataset_id, table_id = destination_table.rsplit('.', 1)
+        table_schema = Tables.generate_schema_from_dataframe(dataframe)
+
+        if method == 'auto':
+            method = 'load' if len(dataframe) >= load_threshold else 'stream'
+
+        if Tables.contains_partition_decorator(table_id):
+            root_table_id = table_id.rsplit('$', 1)[0]
+            if not await self.tables.exists(dataset_id, root_table_id):
+                await self.tables.insert(dataset_id, root_table_id, table_schema,
+                                         body={'timePartitioning': {'type': 'DAY'}})
+
+            # the checks of Bigquery._prepare_partitioned_table
+            table_resource = await self.tables.get(dataset_id, root_table_id)
+            if not Tables.fields_are_subset(table_resource['schema']['fields'], table_schema):
+                raise InvalidSchema("Please verify that the structure and "
+                                    "data types in the DataFrame match "
+                                    "the schema of the destination table.")
+            if 'timePartitioning' not in table_resource:
+                raise InvalidSchema("Could not write to the partition because "
+                                    "the table is not partitioned.")
+
+            if if_exists == 'fail' and await self.tables.partition_exists(dataset_id, table_id):
+                raise TableCreationError("Could not create the partition "
+                                         "because it already exists. "
+                                         "Change the if_exists parameter to "
+                                         "append or replace data.")
+
+            # the partition is loaded with the schema of its table
+            write_disposition = 'WRITE_TRUNCATE' if if_exists == 'replace' else 'WRITE_APPEND'
+            await self._load(dataframe, dataset_id, table_id, None, write_disposition)
+            return []
+
+        table_exists = await self.tables.exists(dataset_id, table_id)
+        if table_exists:
+            if if_exists == 'fail':
+                raise TableCreationError(
+                    "Could not create the table because it "
+                    "already exists. "
+                    "Change the if_exists parameter to "
+                    "append or replace data.")
+            elif if_exists == 'append':
+                if not await self.tables.schema_is_subset(dataset_id, table_id, table_schema):
+                    raise InvalidSchema("Please verify that the structure and "
+                                        "data types in the DataFrame match "
+                                        "the schema of the destination table.")
+
+        if method == 'load' or if_exists == 'replace':
+            write_disposition = {'fail': 'WRITE_EMPTY',
+                                 'replace': 'WRITE_TRUNCATE',
+                                 'append': 'WRITE_APPEND'}[if_exists]
+            if not table_exists and not await self.datasets.exists(dataset_id):
+                # the load job creates the table, but not its dataset
+                await self.datasets.insert(dataset_id)
+            # rows appended to an existing table are loaded with the schema of the table
+            load_schema = None if table_exists and if_exists == 'append' else table_schema
+            await self._load(dataframe, dataset_id, table_id, load_schema, write_disposition)
+            return []
+
+        if not table_exists:
+            await self.tables.insert(dataset_id, table_id, table_schema)
+
+        await self._insert_all(dataframe, dataset_id, table_id, chunksize, max_in_flight)
+        return []
+
+    async def _insert_query(self, query, config):
+        job_config = {'query': dict(config['query'], query=query)}
+        if 'destinationTable' in job_config['query']:
+            job_config['query']['allowLargeResults'] = True
+
+        job = await self._request('POST', '/projects/{0}/jobs'.format(self.project_id),
+                                  json={'configuration': job_config})
+        return job['jobReference']['jobId']
+
+    async def _query_results(self, job_id, **params):
+        # getQueryResults waits up to timeoutMs for the job to complete
+        params.setdefault('timeoutMs', 10000)
+        return await self._request('GET', '/projects/{0}/queries/{1}'.format(self.project_id, job_id),
+                                   params=params)
+
+    async def _insert_all(self, dataframe, dataset_id, table_id, chunksize, max_in_flight):
+        loop = asyncio.get_running_loop()
+        path = '/projects/{0}/datasets/{1}/tables/{2}/insertAll'.format(self.project_id, dataset_id, table_id)
+        chunks = Tabledata.iter_chunks(dataframe, uuid.uuid4().hex, chunksize, Tabledata.max_request_bytes)
+        pending = set()
+
+        async def send(start, rows):
+            response = await self._request('POST', path, json={'rows': rows})
+            for insert_error in response.get('insertErrors', []):
+                for error in insert_error.get('errors', []):
+                    raise StreamingInsertError(
+                        'Error at Row: {0}, Reason: {1}, Location: {2}, Message: {3}'.format(
+                            start + insert_error['index'], error.get('reason'), error.get('location'),
+                            error.get('message')))
+
+        try:
+            while True:
+                # chunks are serialized in the executor, the loop keeps serving the requests in flight
+                chunk = await loop.run_in_executor(None, next, chunks, None)
+                if chunk is None:
+                    break
+                pending.add(asyncio.ensure_future(send(*chunk)))
+                if len(pending) >= max_in_flight:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        task.result()
+            await asyncio.gather(*pending)
+            pending = set()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _load(self, dataframe, dataset_id, table_id, table_schema, write_disposition):
+        loop = asyncio.get_running_loop()
+        job_config = {
+            'load': {
+                'destinationTable': {
+                    'projectId': self.project_id,
+                    'datasetId': dataset_id,
+                    'tableId': table_id
+                },
+                'sourceFormat': 'NEWLINE_DELIMITED_JSON',
+                'createDisposition': 'CREATE_IF_NEEDED',
+                'writeDisposition': write_disposition
+            }
+        }
+
+        if table_schema is not None:
+            job_config['load']['schema'] = table_schema
+
+        fd, source_path = tempfile.mkstemp(suffix='.json.gz')
+        os.close(fd)
+        try:
+            await loop.run_in_executor(None, partial(Jobs.write_load_file, dataframe, source_path,
+                                                     chunksize=Jobs.load_file_chunksize))
+
+            # resumable upload: the job is described first, the file is then sent to the session uri
+            _, headers, _ = await self._raw_request(
+                'POST', self.upload_url + '/projects/{0}/jobs'.format(self.project_id),
+                params={'uploadType': 'resumable'}, json={'configuration': job_config})
+            job = await self._upload_file(headers['Location'], source_path)
+        finally:
+            os.remove(source_path)
+
+        return await self.wait(job['jobReference']['jobId'])
+
+    async def _upload_file(self, upload_uri, source_path):
+        loop = asyncio.get_running_loop()
+        total_bytes = os.path.getsize(source_path)
+        offset = 0
+
+        with open(source_path, 'rb') as source:
+            while True:
+                source.seek(offset)
+                data = await loop.run_in_executor(None, source.read, self.upload_chunksize)
+                content_range = 'bytes {0}-{1}/{2}'.format(offset, offset + len(data) - 1, total_bytes)
+                status, headers, job = await self._raw_request(
+                    'PUT', upload_uri, data=data, allow_redirects=False,
+                    headers={'Content-Type': 'application/octet-stream', 'Content-Range': content_range})
+                if status != 308:
+                    return job
+
+                # 308 Resume Incomplete, the next chunk starts after the bytes the server has persisted
+                persisted = headers.get('Range')
+                offset = int(persisted.rsplit('-', 1)[1]) + 1 if persisted else 0
+
+    async def _authorization(self):
+        credentials = self._session.credentials
+        if not credentials.valid:
+            if self._refresh_lock is None:
+                self._refresh_lock = asyncio.Lock()
+            async with self._refresh_lock:
+                if not credentials.valid:
+                    import httplib2
+                    from google_auth_httplib2 import Request
+                    await asyncio.get_running_loop().run_in_executor(
+                        None, credentials.refresh, Request(httplib2.Http()))
+        return 'Bearer {0}'.format(credentials.token)
+
+    async def _raw_request(self, method, url, missing_ok=False, headers=None, **kwargs):
+        if self._http is None:
+            self._http = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.pool_size))
+
+        headers = dict(headers or {}, Authorization=await self._authorization())
+        if not url.startswith('https://'):
+            url = self.api_url + url
+
+        async with self._http.request(method, url, headers=headers, **kwargs) as response:
+            content = await response.read()
+        if missing_ok and response.status == 404:
+            return response.status, response.headers, None
+        if response.status >= 400:
+            self._process_error(content)
+        return response.status, response.headers, json.loads(content.decode('utf-8')) if content else {}
+
+    async def _request(self, method, url, missing_ok=False, **kwargs):
+        _, _, content = await self._raw_request(method, url, missing_ok=missing_ok, **kwargs)
+        return content
+
+    @staticmethod
+    def _process_error(content):
+        # same messages as GbqConnector.process_http_error
+        try:
+            status = json.loads(content.decode('utf-8'))['error']
+        except (ValueError, KeyError):
+            raise GenericGBQException(content)
+
+        errors = status.get('errors', None)
+        if errors:
+            for error in errors:
+                raise GenericGBQException(
+                    "Reason: {0}, Message: {1}".format(error['reason'], error['message']))
+
+        raise GenericGBQException(errors)
+
+
+class AsyncTables(object):
+    """ Table metadata calls of `AsyncBigquery`, see `Tables` """
+
+    def __init__(self, client):
+        self.client = client
+
+    def _path(self, dataset_id, table_id=None):
+        path = '/projects/{0}/datasets/{1}/tables'.format(self.client.project_id, dataset_id)
+        return path if table_id is None else path + '/' + table_id
+
+    async def get(self, dataset_id, table_id):
+        return await self.client._request('GET', self._path(dataset_id, table_id))
+
+    async def get_schema(self, dataset_id, table_id):
+        table = await self.get(dataset_id, table_id)
+        return [{'name': field['name'], 'type': field['type']} for field in table['schema']['fields']]
+
+    async def exists(self, dataset_id, table_id):
+        if Tables.contains_partition_decorator(table_id):
+            table_id = table_id.rsplit('$', 1)[0]
+        return await self.client._request('GET', self._path(dataset_id, table_id), missing_ok=True) is not None
+
+    async def partition_exists(self, dataset_id, table_id):
+        table = await self.client._request('GET', self._path(dataset_id, table_id), missing_ok=True)
+        return table is not None and Tables._holds_rows(table)
+
+    async def schema_is_subset(self, dataset_id, table_id, schema):
+        return Tables.fields_are_subset(await self.get_schema(dataset_id, table_id), schema)
+
+    async def insert(self, dataset_id, table_id, schema, body=None):
+        if not await self.client.datasets.exists(dataset_id):
+            await self.client.datasets.insert(dataset_id)
+
+        resource = {
+            'schema': schema,
+            'tableReference': {
+                'tableId': table_id,
+                'projectId': self.client.project_id,
+                'datasetId': dataset_id
+            }
+        }
+        if body is not None:
+            resource.update(body)
+
+        return await self.client._request('POST', self._path(dataset_id), json=resource)
+
+    async def delete(self, dataset_id, table_id):
+        await self.client._request('DELETE', self._path(dataset_id, table_id), missing_ok=True)
+
+    async def list(self, dataset_id):
+        table_list = []
+        params = {}
+        while True:
+            response = await self.client._request('GET', self._path(dataset_id), params=params)
+            table_list.extend(table['tableReference']['tableId'] for table in response.get('tables', []))
+            if not response.get('nextPageToken'):
+                return table_list
+            params['pageToken'] = response['nextPageToken']
+
+
+class AsyncDatasets(object):
+    """ Dataset metadata calls of `AsyncBigquery`, see `Datasets` """
+
+    def __init__(self, client):
+        self.client = client
+
+    def _path(self, dataset_id=None):
+        path = '/projects/{0}/datasets'.format(self.client.project_id)
+        return path if dataset_id is None else path + '/' + dataset_id
+
+    async def exists(self, dataset_id):
+        return await self.client._request('GET', self._path(dataset_id), missing_ok=True) is not None
+
+    async def insert(self, dataset_id):
+        return await self.client._request('POST', self._path(), json={
+            'datasetReference': {
+                'projectId': self.client.project_id,
+                'datasetId': dataset_id
+            }
+        })
+
+    async def delete(self, dataset_id, delete_contents=False):
+        await self.client._request('DELETE', self._path(dataset_id),
+                                   params={'deleteContents': 'true' if delete_contents else 'false'})
+
+    async def list(self):
+        dataset_list = []
+        params = {}
+        while True:
+            response = await self.client._request('GET', self._path(), params=params)
+            dataset_list.extend(dataset['datasetReference']['datasetId'] for dataset in response.get('datasets', []))
+            if not response.get('nextPageToken'):
+                return dataset_list
+            params['pageToken'] = response['nextPageToken']
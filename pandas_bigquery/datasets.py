@@ -4,14 +4,14 @@ from pandas_bigquery.gbqconnector import GbqConnector
 
 class Datasets(GbqConnector):
     def __init__(self, project_id, reauth=False, verbose=False,
-                 private_key=None):
+                 private_key=None, session=None):
         try:
             from googleapiclient.errors import HttpError
         except:
             from apiclient.errors import HttpError
         self.http_error = HttpError
         super(Datasets, self).__init__(project_id, reauth, verbose,
-                                       private_key)
+                                       private_key, session=session)
 
     def exists(self, dataset_id):
         """ Check if a dataset exists in Google BigQuery
@@ -38,6 +38,31 @@ class Datasets(GbqConnector):
             else:
                 self.process_http_error(ex)
 
+    def exists_many(self, dataset_ids, errors='raise'):
+        """ Check if many datasets exist, sending the requests in batches
+
+        Parameters
+        ----------
+        dataset_ids : list
+            Names of datasets to be verified
+        errors : str
+            'raise' to raise the first error once every request is sent,
+            or 'report' to return the errors as the result of their dataset
+
+        Returns
+        -------
+        dict
+            True for the datasets that exist, otherwise False, keyed by
+            dataset name
+        """
+
+        requests = [self.service.datasets().get(
+            projectId=self.project_id,
+            datasetId=dataset_id) for dataset_id in dataset_ids]
+
+        return self._execute_many(dataset_ids, requests,
+                                  lambda response: True, False, errors)
+
     def list(self):
         """ Return a list of datasets in Google BigQuery
 
@@ -1,6 +1,11 @@
 import json
+import os
 import time
 import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue, Full
 
 from distutils.version import StrictVersion
 from pandas import compat
@@ -72,9 +77,111 @@ def _test_google_api_imports():
     _check_google_client_version()
 
 
+# discovery documents already loaded by this process, by cache path
+_discovery_documents = {}
+_discovery_lock = threading.Lock()
+
+
+def _get_discovery_document(cache_dir=None, max_age=None):
+    """ Load the BigQuery v2 discovery document without fetching it when
+    possible
+
+    The document is looked up in memory, then in the documents bundled
+    with google-api-python-client >= 2.0, then in `cache_dir` if the
+    cached copy is younger than `max_age` seconds. It is only fetched
+    from the discovery service when none of them has a valid document,
+    and then written to `cache_dir`. An outdated cached copy is still
+    used when the discovery service cannot be reached. A document is
+    valid when it describes the bigquery API at version v2.
+    """
+    cache_path = None
+    if cache_dir is not None:
+        cache_path = os.path.join(cache_dir, 'bigquery.v2.json')
+
+    with _discovery_lock:
+        document = _discovery_documents.get(cache_path)
+        if document is not None:
+            return document
+
+        try:
+            from googleapiclient.discovery_cache import get_static_doc
+            document = _check_discovery_document(
+                get_static_doc('bigquery', 'v2'))
+        except ImportError:
+            pass
+
+        cached_document = None
+        if document is None and cache_path is not None \
+                and os.path.exists(cache_path):
+            with open(cache_path) as f:
+                cached_document = _check_discovery_document(f.read())
+            if max_age is None or \
+                    time.time() - os.path.getmtime(cache_path) < max_age:
+                document = cached_document
+
+        if document is None:
+            try:
+                document = _fetch_discovery_document()
+            except Exception:
+                if cached_document is None:
+                    raise
+                document = cached_document
+            else:
+                if cache_path is not None:
+                    _write_discovery_document(cache_path, document)
+
+        _discovery_documents[cache_path] = document
+        return document
+
+
+def _check_discovery_document(document):
+    if not document:
+        return None
+    try:
+        description = json.loads(document)
+    except ValueError:
+        return None
+    if description.get('name') != 'bigquery' or \
+            description.get('version') != 'v2':
+        return None
+    return document
+
+
+def _fetch_discovery_document():
+    import httplib2
+    from googleapiclient.discovery import DISCOVERY_URI
+
+    uri = DISCOVERY_URI.format(api='bigquery', apiVersion='v2')
+    response, content = httplib2.Http().request(uri)
+    if response.status != 200:
+        raise GenericGBQException(
+            "Could not fetch the BigQuery discovery document, "
+            "status {0}".format(response.status))
+
+    document = _check_discovery_document(bytes_to_str(content))
+    if document is None:
+        raise GenericGBQException(
+            "Invalid BigQuery discovery document at {0}".format(uri))
+    return document
+
+
+def _write_discovery_document(cache_path, document):
+    # the cache is an optimization, a read-only location only disables it
+    try:
+        cache_dir = os.path.dirname(cache_path)
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        temporary_path = '{0}.{1}.tmp'.format(cache_path, os.getpid())
+        with open(temporary_path, 'w') as f:
+            f.write(document)
+        os.replace(temporary_path, cache_path)
+    except (IOError, OSError):
+        pass
+
+
 def _try_credentials(project_id, credentials):
     import httplib2
-    from googleapiclient.discovery import build
+    from googleapiclient.discovery import build_from_document
     import googleapiclient.errors
     from google_auth_httplib2 import AuthorizedHttp
 
@@ -84,7 +191,10 @@ def _try_credentials(project_id, credentials):
     http = httplib2.Http()
     try:
         authed_http = AuthorizedHttp(credentials, http=http)
-        bigquery_service = build('bigquery', 'v2', http=authed_http)
+        bigquery_service = build_from_document(
+            _get_discovery_document(GbqConnector.discovery_cache_dir,
+                                    GbqConnector.discovery_cache_max_age),
+            http=authed_http)
         # Check if the application has rights to the BigQuery project
         jobs = bigquery_service.jobs()
         job_data = {'configuration': {'query': {'query': 'SELECT 1'}}}
@@ -94,21 +204,88 @@ def _try_credentials(project_id, credentials):
         return None
 
 
+class _ProducerThreads(object):
+    # daemon threads running the producers of `GbqConnector.prefetch`.
+    # Services are thread-local, a new thread would build a new service
+    # and open a new connection for every query, so the threads are kept
+    # once idle and reused. A thread is started whenever none is idle, a
+    # producer never waits for another one to finish.
+
+    max_idle = 8
+
+    def __init__(self):
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def submit(self, task):
+        with self._lock:
+            tasks = self._idle.pop() if self._idle else None
+
+        if tasks is None:
+            tasks = Queue()
+            thread = threading.Thread(target=self._run, args=(tasks,))
+            thread.daemon = True
+            thread.start()
+
+        tasks.put(task)
+
+    def _run(self, tasks):
+        while True:
+            task = tasks.get()
+            try:
+                task()
+            except Exception:
+                pass
+
+            with self._lock:
+                if len(self._idle) >= self.max_idle:
+                    return
+                self._idle.append(tasks)
+
+
+_producers = _ProducerThreads()
+
+
 class GbqConnector(object):
     # Added scopes to support federated tables in Google Drive
     scope = ['https://www.googleapis.com/auth/bigquery',
              'https://www.googleapis.com/auth/cloud-platform',
              'https://www.googleapis.com/auth/drive']
 
+    # Services are built from a discovery document cached on disk, see
+    # `get_discovery_document`. None disables the disk cache.
+    discovery_cache_dir = os.path.join(os.path.expanduser('~'), '.cache',
+                                       'pandas_bigquery')
+    discovery_cache_max_age = 7 * 24 * 3600
+
+    # Number of requests sent in a single batch HTTP request by
+    # `execute_batch`, the API accepts up to 1000
+    batch_size = 100
+
     def __init__(self, project_id, reauth=False, verbose=False,
-                 private_key=None, auth_local_webserver=False):
+                 private_key=None, auth_local_webserver=False, session=None,
+                 pool_size=None):
         self.project_id = project_id
         self.reauth = reauth
         self.verbose = verbose
         self.private_key = private_key
         self.auth_local_webserver = auth_local_webserver
-        self.credentials = self.get_credentials()
-        self.service = self.get_service()
+        self.pool_size = pool_size
+        self._local = threading.local()
+        self._session = session
+        self._shared_service = None
+        if session is not None:
+            # the credentials and the services of the session are reused,
+            # no token is fetched and no discovery client is built
+            self.credentials = session.credentials
+        elif pool_size:
+            # a single service whose requests go through a pool of
+            # connections, see `pandas_bigquery.transport.HttpPool`
+            self.credentials = self.get_credentials()
+            self._shared_service = self.get_service()
+        else:
+            self.credentials = self.get_credentials()
+            self.service = self.get_service()
 
         # BQ Queries costs $5 per TB. First 1 TB per month is free
         # see here for more: https://cloud.google.com/bigquery/pricing
@@ -330,18 +507,244 @@ class GbqConnector(object):
             num /= 1024.0
         return fmt % (num, 'Y', suffix)
 
+    @property
+    def session(self):
+        """ The connector owning the credentials and the services used by
+        this one, see `pandas_bigquery.session.Session` """
+        return self._session if self._session is not None else self
+
+    @property
+    def service(self):
+        # httplib2 connections are not thread-safe, every thread gets
+        # its own service object the first time it needs one
+        service = getattr(self._local, 'service', None)
+        if service is None:
+            if self._session is not None:
+                return self._session.service
+            if self._shared_service is not None:
+                return self._shared_service
+            service = self._local.service = self.get_service()
+        return service
+
+    @service.setter
+    def service(self, service):
+        self._local.service = service
+
+    def get_discovery_document(self):
+        """ The BigQuery v2 discovery document, loaded from memory, from
+        the documents bundled with the client library or from
+        `discovery_cache_dir` when possible, so that building a service
+        needs no request """
+        return _get_discovery_document(self.discovery_cache_dir,
+                                       self.discovery_cache_max_age)
+
     def get_service(self):
-        import httplib2
         from google_auth_httplib2 import AuthorizedHttp
-        from googleapiclient.discovery import build
+        from googleapiclient.discovery import build_from_document
+        from pandas_bigquery.transport import HttpPool, build_http
 
-        http = httplib2.Http()
-        authed_http = AuthorizedHttp(
-            self.credentials, http=http)
-        bigquery_service = build('bigquery', 'v2', http=authed_http)
+        if self.pool_size:
+            authed_http = HttpPool(self.credentials, self.pool_size)
+        else:
+            http = build_http()
+            authed_http = AuthorizedHttp(
+                self.credentials, http=http)
+        bigquery_service = build_from_document(self.get_discovery_document(),
+                                               http=authed_http)
 
         return bigquery_service
 
+    def fetch_ranges(self, fetch_page, start_index, end_index, page_size,
+                     max_workers):
+        """ Fetch a range of rows concurrently, split by startIndex
+
+        Parameters
+        ----------
+        fetch_page : callable
+            fetch_page(service, start_index, max_results) requesting a
+            single page and returning its list of rows. The page may hold
+            fewer rows than requested.
+        start_index : int
+            Index of the first row to fetch
+        end_index : int
+            Index past the last row to fetch
+        page_size : int
+            Number of rows requested by each worker at a time
+        max_workers : int
+            Number of concurrent fetchers, each using its own connection
+
+        Returns
+        -------
+        generator
+            Pages of rows, in order
+        """
+
+        ranges = iter([(index, min(page_size, end_index - index))
+                       for index in range(start_index, end_index, page_size)])
+
+        def fetch_range(index, num_rows):
+            rows = []
+            while len(rows) < num_rows:
+                page = fetch_page(self.service, index + len(rows),
+                                  num_rows - len(rows))
+                if not page:
+                    raise GenericGBQException(
+                        "Expected {0} rows starting at row {1}, "
+                        "received {2}".format(num_rows, index, len(rows)))
+                rows.extend(page)
+            return rows
+
+        executor = ThreadPoolExecutor(max_workers)
+        pending = deque()
+        try:
+            # keep a bounded number of ranges in flight so that fetching
+            # cannot run arbitrarily far ahead of the consumer
+            for index, num_rows in ranges:
+                pending.append(executor.submit(fetch_range, index, num_rows))
+                if len(pending) == 2 * max_workers:
+                    break
+
+            while pending:
+                rows = pending.popleft().result()
+                for index, num_rows in ranges:
+                    pending.append(executor.submit(fetch_range, index,
+                                                   num_rows))
+                    break
+                yield rows
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    @staticmethod
+    def prefetch(pages, max_pending):
+        """ Consume an iterator from a background thread
+
+        The producer runs ahead of the consumer by at most `max_pending`
+        items, so fetching the next page overlaps with processing the
+        current one. Exceptions raised by the producer are re-raised in
+        the consuming thread.
+
+        Parameters
+        ----------
+        pages : iterator
+            Pages to be fetched in the background
+        max_pending : int
+            Maximum number of fetched pages waiting to be consumed
+
+        Returns
+        -------
+        generator
+            The pages of the iterator, in order
+        """
+
+        queue = Queue(max_pending)
+        stop = threading.Event()
+        finished = threading.Event()
+        done = object()
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    queue.put(item, timeout=0.1)
+                    return True
+                except Full:
+                    continue
+            return False
+
+        def produce():
+            try:
+                for page in pages:
+                    if not put((page, None)):
+                        return
+                put((done, None))
+            except Exception as ex:
+                put((done, ex))
+            finally:
+                close = getattr(pages, 'close', None)
+                if close is not None:
+                    close()
+                finished.set()
+
+        # producers run on long-lived threads, so the services these
+        # threads build are reused by the following calls
+        _producers.submit(produce)
+        try:
+            while True:
+                page, error = queue.get()
+                if page is done:
+                    if error is not None:
+                        raise error
+                    return
+                yield page
+        finally:
+            stop.set()
+            finished.wait()
+
+    def execute_batch(self, requests, batch_size=None):
+        """ Send requests through the batch HTTP endpoint
+
+        The requests are packed `batch_size` at a time in a single HTTP
+        round-trip each, and every sub-response is mapped back to the
+        request it answers.
+
+        Parameters
+        ----------
+        requests : list
+            googleapiclient.http.HttpRequest objects, built but not executed
+        batch_size : int
+            Maximum number of requests of a batch, `batch_size` by default
+
+        Returns
+        -------
+        list
+            Tuples of the response and the HttpError of each request, in
+            the order of the requests. One of them is always None.
+        """
+
+        batch_size = batch_size or self.batch_size
+        results = [None] * len(requests)
+
+        def callback(request_id, response, exception):
+            results[int(request_id)] = (response, exception)
+
+        for start in range(0, len(requests), batch_size):
+            batch = self.service.new_batch_http_request(callback=callback)
+            for index in range(start, min(start + batch_size, len(requests))):
+                batch.add(requests[index], request_id=str(index))
+            batch.execute()
+
+        return results
+
+    def _execute_many(self, keys, requests, found, missing=None,
+                      errors='raise'):
+        # results of `execute_batch` keyed by `keys`. `found` maps a
+        # response to its result, 404 errors are mapped to `missing`
+        # unless it is None, and other errors are raised once every
+        # request is sent, or reported as the result of their key
+        if errors not in ('raise', 'report'):
+            raise ValueError("'{0}' is not valid for errors".format(errors))
+
+        results = {}
+        first_error = None
+        for key, (response, ex) in zip(keys,
+                                       self.execute_batch(requests)):
+            if ex is None:
+                results[key] = found(response)
+            elif missing is not None and ex.resp.status == 404:
+                results[key] = missing
+            else:
+                try:
+                    self.process_http_error(ex)
+                except GenericGBQException as error:
+                    results[key] = error
+                    first_error = first_error or error
+
+        if first_error is not None and errors == 'raise':
+            raise first_error
+
+        return results
+
     @staticmethod
     def process_http_error(ex):
         # See `BigQuery Troubleshooting Errors
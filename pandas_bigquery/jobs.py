@@ -1,17 +1,21 @@
 from pandas_bigquery.exceptions import *
 from pandas_bigquery.gbqconnector import GbqConnector
+from time import sleep
+import gzip
 import logging, sys
+import os
+import tempfile
 
 log = logging.getLogger()
 
 class Jobs(GbqConnector):
-    def __init__(self, project_id, reauth=False, verbose=False, private_key=None):
+    def __init__(self, project_id, reauth=False, verbose=False, private_key=None, session=None):
         try:
             from googleapiclient.errors import HttpError
         except:
             from apiclient.errors import HttpError
         self.http_error = HttpError
-        super(Jobs, self).__init__(project_id, reauth, verbose, private_key)
+        super(Jobs, self).__init__(project_id, reauth, verbose, private_key, session=session)
 
     def _print(self, msg, end='\n'):
         return log.info(msg)
@@ -115,13 +119,232 @@ class Jobs(GbqConnector):
         if self.verbose:
             self._print('Copy completed.')
 
-    def query(self, query, **kwargs):
+    # rows are serialized and compressed chunk by chunk, so a load file never
+    # needs the whole frame encoded in memory
+    load_file_chunksize = 100000
+
+    def load(self, dataset_id, table_id, source_path,
+             source_format='NEWLINE_DELIMITED_JSON', schema=None,
+             write_disposition='WRITE_APPEND', chunksize=None, **kwargs):
+        """ Run a load job from a local file and wait for completion
+
+        The file is sent with a resumable media upload, so large files
+        are uploaded in chunks and interrupted chunks are retried.
+
+        Parameters
+        ----------
+        dataset_id : str
+            Name of the BigQuery dataset for the table
+        table_id : str
+            Name of the BigQuery table, partition decorators are allowed
+        source_path : str
+            Path of the file to be loaded
+        source_format : str
+            'NEWLINE_DELIMITED_JSON', 'CSV', 'AVRO' or 'PARQUET'
+        schema : dict
+            Schema of the table, only needed when the table is created or
+            its schema is replaced
+        write_disposition : str
+            'WRITE_APPEND', 'WRITE_TRUNCATE' or 'WRITE_EMPTY'
+        chunksize : int
+            Size in bytes of each uploaded chunk, 100 MB by default
+        **kwargs : Arbitrary keyword arguments
+            configuration (dict): load job extra parameters
+            For example:
+
+                configuration = {'load':
+                                    {'ignoreUnknownValues': True}
+                                }
+
+            For more information see `BigQuery SQL Reference
+            <https://cloud.google.com/bigquery/docs/reference/rest/v2/jobs#configuration.load>`__
+        """
+        try:
+            from googleapiclient.errors import HttpError
+            from googleapiclient.http import MediaFileUpload
+        except:
+            from apiclient.errors import HttpError
+            from apiclient.http import MediaFileUpload
+        from google.auth.exceptions import RefreshError
+
+        job_collection = self.service.jobs()
+
+        job_config = {
+            'load': {
+                'destinationTable': {
+                    'projectId': self.project_id,
+                    'datasetId': dataset_id,
+                    'tableId': table_id
+                },
+                'sourceFormat': source_format,
+                'createDisposition': 'CREATE_IF_NEEDED',
+                'writeDisposition': write_disposition
+            }
+        }
+        if schema is not None:
+            job_config['load']['schema'] = schema
+
+        config = kwargs.get('configuration')
+        if config is not None:
+            if len(config) != 1:
+                raise ValueError("Only one job type must be specified, but "
+                                 "given {}".format(','.join(config.keys())))
+            if 'load' in config:
+                if 'destinationTable' in config['load']:
+                    raise ValueError("destination table must be specified "
+                                     "as parameters")
+
+                job_config['load'].update(config['load'])
+            else:
+                raise ValueError("Only 'load' job type is supported")
+
+        job_data = {
+            'configuration': job_config
+        }
+
+        media_kwargs = {} if chunksize is None else {'chunksize': chunksize}
+        media = MediaFileUpload(source_path,
+                                mimetype='application/octet-stream',
+                                resumable=True, **media_kwargs)
+
+        self._start_timer()
+        try:
+            self._print('Requesting load... ', end="")
+            job_reply = job_collection.insert(
+                projectId=self.project_id, body=job_data,
+                media_body=media).execute()
+            self._print('ok.')
+        except (RefreshError, ValueError):
+            if self.private_key:
+                raise AccessDenied(
+                    "The service account credentials are not valid")
+            else:
+                raise AccessDenied(
+                    "The credentials have been revoked or expired, "
+                    "please re-run the application to re-authorize")
+        except HttpError as ex:
+            self.process_http_error(ex)
+
+        job_reference = job_reply['jobReference']
+        job_id = job_reference['jobId']
+        self._print('Job ID: %s\nLoad running...' % job_id)
+
+        while job_reply['status']['state'] != 'DONE':
+            self.print_elapsed_seconds('  Elapsed', 's. Waiting...')
+            sleep(1)
+
+            try:
+                job_reply = job_collection.get(
+                    projectId=job_reference['projectId'],
+                    jobId=job_id).execute()
+            except HttpError as ex:
+                self.process_http_error(ex)
+
+        error = job_reply['status'].get('errorResult')
+        if error:
+            raise GenericGBQException(
+                "Reason: {0}, Message: {1}".format(error.get('reason'),
+                                                   error.get('message')))
+
+        if self.verbose:
+            self._print('Load completed, {0} rows loaded.'.format(
+                job_reply.get('statistics', {}).get('load', {})
+                .get('outputRows', 0)))
+
+        return job_reply
+
+    def load_dataframe(self, dataframe, dataset_id, table_id, schema=None,
+                       write_disposition='WRITE_APPEND',
+                       source_format='NEWLINE_DELIMITED_JSON', **kwargs):
+        """ Load a DataFrame into a table with a single load job
+
+        The DataFrame is written to a temporary file, see
+        `write_load_file`, which is removed once the job is done.
+
+        Parameters
+        ----------
+        dataframe : DataFrame
+            Rows to be loaded
+        dataset_id : str
+            Name of the BigQuery dataset for the table
+        table_id : str
+            Name of the BigQuery table, partition decorators are allowed
+        schema : dict
+            Schema of the table, see `load`
+        write_disposition : str
+            'WRITE_APPEND', 'WRITE_TRUNCATE' or 'WRITE_EMPTY'
+        source_format : str
+            'NEWLINE_DELIMITED_JSON' for gzip compressed JSON lines, or
+            'PARQUET', which requires pyarrow or fastparquet
+        **kwargs : Arbitrary keyword arguments
+            configuration (dict): see `load`
+        """
+
+        suffix = '.parquet' if source_format == 'PARQUET' else '.json.gz'
+        fd, source_path = tempfile.mkstemp(suffix=suffix)
+        os.close(fd)
+        try:
+            self.write_load_file(dataframe, source_path, source_format,
+                                 self.load_file_chunksize)
+            # Parquet files carry their own schema
+            if source_format == 'PARQUET':
+                schema = None
+            return self.load(dataset_id, table_id, source_path,
+                             source_format=source_format, schema=schema,
+                             write_disposition=write_disposition, **kwargs)
+        finally:
+            os.remove(source_path)
+
+    @staticmethod
+    def write_load_file(dataframe, path, source_format='NEWLINE_DELIMITED_JSON',
+                        chunksize=100000):
+        """ Write a DataFrame to a file in a format accepted by load jobs
+
+        Parameters
+        ----------
+        dataframe : DataFrame
+            Rows to be written
+        path : str
+            Path of the file
+        source_format : str
+            'NEWLINE_DELIMITED_JSON' for gzip compressed JSON lines, or
+            'PARQUET'
+        chunksize : int
+            Number of rows encoded at a time for JSON lines
+        """
+
+        if source_format == 'PARQUET':
+            dataframe.to_parquet(path, index=False)
+            return
+
+        if source_format != 'NEWLINE_DELIMITED_JSON':
+            raise ValueError("'{0}' is not valid for source_format"
+                             .format(source_format))
+
+        with gzip.open(path, 'wb') as f:
+            for start in range(0, len(dataframe), chunksize):
+                encoded = dataframe.iloc[start:start + chunksize].to_json(
+                    orient='records', lines=True, force_ascii=False,
+                    date_unit='s', date_format='iso')
+                f.write(encoded.encode('utf-8'))
+                if not encoded.endswith('\n'):
+                    f.write(b'\n')
+
+    def query(self, query, max_workers=1, page_size=None, prefetch=0,
+              **kwargs):
         """ Run a query job and wait for completion
 
         Parameters
         ----------
         query : str
             query to be executed
+        max_workers : int
+            Number of concurrent page fetchers, see `query_iter`
+        page_size : int
+            Number of rows requested by each fetcher, see `query_iter`
+        prefetch : int
+            Number of pages fetched ahead in the background, see
+            `query_iter`
         **kwargs : Arbitrary keyword arguments
             configuration (dict): table creation extra parameters
             For example:
@@ -132,8 +355,76 @@ class Jobs(GbqConnector):
 
             For more information see `BigQuery SQL Reference
             <https://cloud.google.com/bigquery/docs/reference/rest/v2/jobs#configuration.query>`__
+
+        Returns
+        -------
+        tuple
+            The schema of the result and the list of all its pages
+        """
+
+        schema, total_rows, pages = self.query_iter(query, max_workers,
+                                                    page_size, prefetch,
+                                                    **kwargs)
+
+        return schema, list(pages)
+
+    def query_iter(self, query, max_workers=1, page_size=None, prefetch=0,
+                   **kwargs):
+        """ Run a query job, wait for completion and page through the results
+
+        Unlike `query`, the result pages are not kept in memory: they are
+        requested from BigQuery one at a time while the returned generator
+        is consumed.
+
+        Parameters
+        ----------
+        query : str
+            query to be executed
+        max_workers : int
+            Number of concurrent page fetchers. With more than one worker,
+            the rows after the first page are split into startIndex ranges
+            and downloaded in parallel, each fetcher using its own
+            connection. Pages are still returned in order.
+        page_size : int
+            Number of rows requested by each fetcher at a time. Defaults
+            to the size of the first page returned by BigQuery.
+        prefetch : int
+            Number of pages fetched ahead by a background thread while
+            the caller processes the current page. 0 fetches each page
+            only when it is requested.
+        **kwargs : Arbitrary keyword arguments
+            configuration (dict): see `query`
+
+        Returns
+        -------
+        tuple
+            The schema of the result, the total number of rows and a
+            generator yielding the pages of rows in order
         """
 
+        job_reference, query_reply = self._run_query(query, **kwargs)
+
+        try:
+            total_rows = int(query_reply['totalRows'])
+        except KeyError:
+            total_rows = 0
+
+        # Only read schema on first page
+        schema = query_reply['schema']
+
+        if max_workers > 1:
+            pages = self._iter_pages_parallel(job_reference, query_reply,
+                                              total_rows, max_workers,
+                                              page_size)
+        else:
+            pages = self._iter_pages(job_reference, query_reply, total_rows)
+
+        if prefetch > 0:
+            pages = self.prefetch(pages, prefetch)
+
+        return schema, total_rows, pages
+
+    def _run_query(self, query, **kwargs):
         try:
             from googleapiclient.errors import HttpError
         except:
@@ -217,33 +508,39 @@ class Jobs(GbqConnector):
 
             self._print('Retrieving results...')
 
+        return job_reference, query_reply
+
+    def _iter_pages(self, job_reference, query_reply, total_rows):
         try:
-            total_rows = int(query_reply['totalRows'])
-        except KeyError:
-            total_rows = 0
+            from googleapiclient.errors import HttpError
+        except:
+            from apiclient.errors import HttpError
 
-        result_pages = list()
+        num_pages = 0
         seen_page_tokens = list()
         current_row = 0
-        # Only read schema on first page
-        schema = query_reply['schema']
 
         # Loop through each page of data
         while 'rows' in query_reply and current_row < total_rows:
             page = query_reply['rows']
-            result_pages.append(page)
+            num_pages += 1
             current_row += len(page)
 
             self.print_elapsed_seconds(
                 '  Got page: {}; {}% done. Elapsed'.format(
-                    len(result_pages),
+                    num_pages,
                     round(100.0 * current_row / total_rows)))
 
+            page_token = query_reply.get('pageToken', None)
+
+            # release the reply before handing the page out, so only the
+            # page being consumed is kept alive
+            query_reply = None
+            yield page
+
             if current_row == total_rows:
                 break
 
-            page_token = query_reply.get('pageToken', None)
-
             if not page_token and current_row < total_rows:
                 raise InvalidPageToken("Required pageToken was missing. "
                                        "Received {0} of {1} rows"
@@ -255,9 +552,9 @@ class Jobs(GbqConnector):
             seen_page_tokens.append(page_token)
 
             try:
-                query_reply = job_collection.getQueryResults(
+                query_reply = self.service.jobs().getQueryResults(
                     projectId=job_reference['projectId'],
-                    jobId=job_id,
+                    jobId=job_reference['jobId'],
                     pageToken=page_token).execute()
             except HttpError as ex:
                 self.process_http_error(ex)
@@ -268,7 +565,47 @@ class Jobs(GbqConnector):
         # print basic query stats
         self._print('Got {} rows.\n'.format(total_rows))
 
-        return schema, result_pages
+    def _iter_pages_parallel(self, job_reference, query_reply, total_rows,
+                             max_workers, page_size=None):
+        try:
+            from googleapiclient.errors import HttpError
+        except:
+            from apiclient.errors import HttpError
+
+        first_page = query_reply.get('rows', [])
+        if not first_page or len(first_page) >= total_rows:
+            for page in self._iter_pages(job_reference, query_reply,
+                                         total_rows):
+                yield page
+            return
+
+        query_reply = None
+        yield first_page
+
+        def fetch_page(service, start_index, max_results):
+            try:
+                return service.jobs().getQueryResults(
+                    projectId=job_reference['projectId'],
+                    jobId=job_reference['jobId'],
+                    startIndex=start_index,
+                    maxResults=max_results).execute().get('rows', [])
+            except HttpError as ex:
+                self.process_http_error(ex)
+
+        current_row = len(first_page)
+        pages = self.fetch_ranges(fetch_page, current_row, total_rows,
+                                  page_size or len(first_page), max_workers)
+        for num_pages, page in enumerate(pages, 2):
+            current_row += len(page)
+
+            self.print_elapsed_seconds(
+                '  Got page: {}; {}% done. Elapsed'.format(
+                    num_pages,
+                    round(100.0 * current_row / total_rows)))
+
+            yield page
+
+        self._print('Got {} rows.\n'.format(total_rows))
 
     def query_async(self, query, **kwargs):
         """ Run a query job and wait for completion
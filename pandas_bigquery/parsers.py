@@ -0,0 +1,485 @@
+import os
+import uuid
+import weakref
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+
+def rows_to_columns(rows, num_columns):
+    """ Transpose a page of BigQuery rows into per-column value lists
+
+    Parameters
+    ----------
+    rows : list(dict)
+        Rows as returned by the API, each one of the form
+        {'f': [{'v': value}, ...]}
+    num_columns : int
+        Number of fields in the schema
+
+    Returns
+    -------
+    list(list)
+        One list of raw values per column
+    """
+
+    # flatten in a single comprehension and slice the columns out of it,
+    # which is considerably cheaper than transposing nested lists
+    values = [cell['v'] for row in rows for cell in row['f']]
+    return [values[col_num::num_columns] for col_num in range(num_columns)]
+
+
+def flatten_fields(fields, prefix=''):
+    """ Leaf fields of a schema
+
+    Non repeated RECORD fields are expanded into their sub-fields, named
+    after their path in dotted notation ('record.field'). REPEATED fields
+    are kept as a single column.
+    """
+
+    leaves = []
+    for field in fields:
+        name = prefix + str(field['name'])
+        if _is_record(field) and field.get('mode') != 'REPEATED':
+            leaves.extend(flatten_fields(field['fields'], name + '.'))
+        else:
+            leaf = dict(field)
+            leaf['name'] = name
+            leaves.append(leaf)
+    return leaves
+
+
+def flatten_columns(columns, fields):
+    """ Split the raw RECORD columns into the columns of their leaf fields
+
+    The columns are returned in the same order as `flatten_fields`, a null
+    record yields nulls in all of its leaf columns.
+    """
+
+    leaves = []
+    for values, field in zip(columns, fields):
+        if _is_record(field) and field.get('mode') != 'REPEATED':
+            records = [value['f'] if isinstance(value, dict) else None
+                       for value in values]
+            sub_columns = [[record[col_num]['v'] if record is not None
+                            else None for record in records]
+                           for col_num in range(len(field['fields']))]
+            leaves.extend(flatten_columns(sub_columns, field['fields']))
+        else:
+            leaves.append(values)
+    return leaves
+
+
+def _is_record(field):
+    return field['type'] in ('RECORD', 'STRUCT')
+
+
+def null_mask(values):
+    """ Boolean mask of the null entries of a raw column """
+
+    values = np.asarray(values, dtype=object)
+    return np.equal(values, None) | (values == 'null')
+
+
+def column_dtype(field_type, numeric='float'):
+    """ NumPy dtype used to hold a column of the given BigQuery type """
+
+    if field_type in _NUMERIC_TYPES and numeric == 'decimal':
+        return np.dtype(object)
+    return _DTYPES.get(field_type, np.dtype(object))
+
+
+def convert_column(values, field_type, numeric='float'):
+    """ Convert a raw column to its NumPy dtype in bulk
+
+    Parameters
+    ----------
+    values : list
+        Raw values of the column as returned by the API
+    field_type : str
+        BigQuery type of the column
+    numeric : str
+        'float' or 'decimal', how NUMERIC and BIGNUMERIC values are
+        returned
+
+    Returns
+    -------
+    tuple
+        The converted array and the boolean mask of its null entries.
+        Nulls are stored as NaN, NaT or None where the dtype allows it
+        and as 0/False in INTEGER and BOOLEAN columns.
+    """
+
+    raw = np.empty(len(values), dtype=object)
+    raw[:] = values
+    mask = null_mask(raw)
+    has_nulls = mask.any()
+    if has_nulls:
+        raw[mask] = None
+
+    if field_type == 'FLOAT':
+        return raw.astype(float), mask
+
+    elif field_type == 'TIMESTAMP':
+        # epoch seconds in scientific notation, kept at microsecond
+        # precision like datetime.utcfromtimestamp
+        seconds = raw.astype(float)
+        if has_nulls:
+            seconds[mask] = 0
+        micros = np.round(seconds * 1e6).astype(np.int64)
+        timestamps = micros.view('M8[us]')
+        if has_nulls:
+            timestamps[mask] = np.datetime64('NaT')
+        return _to_nanoseconds(timestamps), mask
+
+    elif field_type == 'INTEGER':
+        if has_nulls:
+            raw[mask] = 0
+        return raw.astype(np.int64), mask
+
+    elif field_type == 'BOOLEAN':
+        return raw == 'true', mask
+
+    elif field_type == 'DATE':
+        return _to_datetime64(raw, 'D'), mask
+
+    elif field_type == 'DATETIME':
+        return _to_datetime64(raw, 'us'), mask
+
+    elif field_type == 'TIME':
+        # time of the day, as the time elapsed since midnight
+        return pd.to_timedelta(raw).values, mask
+
+    elif field_type in _NUMERIC_TYPES:
+        if numeric == 'decimal':
+            decimals = np.empty(len(raw), dtype=object)
+            decimals[:] = [None if value is None else Decimal(value)
+                           for value in raw]
+            return decimals, mask
+        return raw.astype(float), mask
+
+    return raw, mask
+
+
+def convert_repeated(values, field, numeric='float'):
+    """ Convert a raw REPEATED column in bulk
+
+    All the elements of the column are converted at once and then split
+    back into one array per row. The elements of REPEATED RECORD fields
+    are returned as lists of dicts.
+
+    Returns
+    -------
+    tuple
+        An object array holding one array (or list) per row and the
+        boolean mask of its null entries
+    """
+
+    values = [value or [] for value in values]
+    elements = [element['v'] for value in values for element in value]
+    bounds = np.cumsum([len(value) for value in values])
+
+    if _is_record(field):
+        result_buffer = ResultBuffer({'fields': field['fields']},
+                                     len(elements), numeric=numeric)
+        result_buffer.append(elements)
+        converted = result_buffer.to_dataframe().to_dict('records')
+    else:
+        converted, _ = convert_column(elements, field['type'], numeric)
+
+    result = np.empty(len(values), dtype=object)
+    start = 0
+    for row_num, end in enumerate(bounds):
+        result[row_num] = converted[start:end]
+        start = end
+
+    return result, np.zeros(len(values), dtype=bool)
+
+
+def _to_datetime64(raw, unit):
+    # NumPy parses ISO 8601 strings, None becomes NaT
+    return _to_nanoseconds(raw.astype('M8[{0}]'.format(unit)))
+
+
+def _to_nanoseconds(values):
+    valid = values[~np.isnat(values)]
+    if len(valid) and (valid.min() < _MIN_DATETIME64 or
+                       valid.max() > _MAX_DATETIME64):
+        # dates such as 9999-12-31 can't be represented as datetime64[ns],
+        # the column holds datetime.date or datetime.datetime objects
+        # instead
+        return values.astype(object)
+    return values.astype('M8[ns]')
+
+
+def _to_objects(values, field_type):
+    # datetime64[ns] values as the objects of an out of range column,
+    # NaT becomes None
+    unit = 'D' if field_type == 'DATE' else 'us'
+    return values.astype('M8[{0}]'.format(unit)).astype(object)
+
+
+def finalize_column(array, mask, field_type, dtypes=None):
+    """ Turn a converted column into the array stored in the DataFrame
+
+    By default INTEGER and BOOLEAN columns containing nulls become object
+    arrays with None in the null positions. With dtypes='nullable',
+    INTEGER, BOOLEAN and STRING columns become pandas Int64, boolean and
+    string extension arrays built on the converted values and their null
+    mask. Every other column is returned as is, without a copy.
+    """
+
+    if dtypes == 'nullable' and field_type in ('INTEGER', 'BOOLEAN', 'STRING'):
+        return _nullable_array(array, mask, field_type)
+
+    if field_type in ('INTEGER', 'BOOLEAN') and mask.any():
+        result = array.astype(object)
+        result[mask] = None
+        return result
+
+    return array
+
+
+def _nullable_array(array, mask, field_type):
+    try:
+        from pandas.arrays import BooleanArray, IntegerArray
+    except ImportError:
+        raise ImportError("dtypes='nullable' requires pandas >= 1.0, "
+                          "current version {0}".format(pd.__version__))
+
+    if field_type == 'INTEGER':
+        return IntegerArray(array, mask)
+    elif field_type == 'BOOLEAN':
+        return BooleanArray(array, mask)
+    return pd.array(array, dtype='string')
+
+
+class ResultBuffer(object):
+    """ Typed per-column arrays a result is written into page by page
+
+    The arrays are allocated once for the total number of rows, so pages
+    are converted straight into their final location and the DataFrame
+    is built at the end without concatenating or casting.
+
+    STRING columns can be dictionary encoded while pages are appended:
+    only the integer codes are stored, and the dictionary is extended
+    with the new values found in every page.
+
+    Parameters
+    ----------
+    schema : dict
+        Schema of the result, as returned by the API
+    total_rows : int
+        Number of rows of the result
+    dtypes : str
+        None for NumPy dtypes, or 'nullable' for pandas Int64, boolean
+        and string extension dtypes
+    categorical : list(str)
+        Names of STRING columns returned as pandas.Categorical
+    categorical_threshold : int
+        Encode every other STRING column as long as it holds at most this
+        many distinct values. Columns exceeding it are decoded back to
+        plain strings.
+    numeric : str
+        'float' or 'decimal', how NUMERIC and BIGNUMERIC values are
+        returned
+    spill_dir : str
+        Directory where the fixed width columns (numbers, booleans, dates,
+        categorical codes) are allocated as memory-mapped .npy files
+        instead of in memory. The files are removed once the arrays
+        mapping them are garbage collected. Object columns always stay in
+        memory.
+    spill_threshold : int
+        Only spill when the fixed width columns take at least this many
+        bytes
+
+    RECORD fields are flattened into one column per leaf field, see
+    `flatten_fields`.
+    """
+
+    def __init__(self, schema, total_rows, dtypes=None, categorical=None,
+                 categorical_threshold=None, numeric='float', spill_dir=None,
+                 spill_threshold=0):
+        if dtypes not in (None, 'nullable'):
+            raise ValueError("'{0}' is not valid for dtypes".format(dtypes))
+
+        if numeric not in ('float', 'decimal'):
+            raise ValueError("'{0}' is not valid for numeric".format(numeric))
+
+        self.schema_fields = schema['fields']
+        self.fields = flatten_fields(self.schema_fields)
+        self.names = [field['name'] for field in self.fields]
+        self.total_rows = total_rows
+        self.dtypes = dtypes
+        self.numeric = numeric
+        self.categorical_threshold = categorical_threshold
+        self.num_rows = 0
+
+        categorical = set(categorical or [])
+        string_columns = set(name for name, field in zip(self.names, self.fields)
+                             if field['type'] == 'STRING' and
+                             field.get('mode') != 'REPEATED')
+        if not categorical.issubset(string_columns):
+            raise ValueError("Only STRING columns can be categorical: {0}"
+                             .format(', '.join(sorted(categorical - string_columns))))
+
+        # column number -> {value: code} for the dictionary encoded columns
+        self._dictionaries = dict(
+            (col_num, {}) for col_num, name in enumerate(self.names)
+            if name in categorical or
+            (name in string_columns and categorical_threshold is not None))
+        self._fixed_categorical = categorical
+
+        column_dtypes = [self._column_dtype(col_num)
+                         for col_num in range(len(self.fields))]
+        # null masks are only needed where the dtype can't hold nulls
+        masked = [column_dtypes[col_num] in (np.dtype(np.int64), np.dtype(bool))
+                  for col_num in range(len(self.fields))]
+
+        fixed_width_bytes = total_rows * sum(
+            dtype.itemsize for dtype in column_dtypes + [np.dtype(bool)] * sum(masked)
+            if dtype != np.dtype(object))
+        self._spill_prefix = None
+        if spill_dir is not None and total_rows > 0 and \
+                fixed_width_bytes >= spill_threshold:
+            self._spill_prefix = os.path.join(spill_dir, uuid.uuid4().hex)
+
+        self._columns = [self._allocate('column{0}'.format(col_num), dtype)
+                         for col_num, dtype in enumerate(column_dtypes)]
+        self._masks = [self._allocate('mask{0}'.format(col_num), np.dtype(bool))
+                       if needs_mask else None
+                       for col_num, needs_mask in enumerate(masked)]
+
+    def _allocate(self, name, dtype):
+        if self._spill_prefix is None or dtype == np.dtype(object):
+            return np.empty(self.total_rows, dtype=dtype)
+
+        filename = '{0}_{1}.npy'.format(self._spill_prefix, name)
+        array = np.lib.format.open_memmap(filename, mode='w+', dtype=dtype,
+                                          shape=(self.total_rows,))
+        weakref.finalize(array, _remove_file, filename)
+        return array
+
+    def _column_dtype(self, col_num):
+        if col_num in self._dictionaries:
+            return np.dtype(np.int32)
+        elif self.fields[col_num].get('mode') == 'REPEATED':
+            return np.dtype(object)
+        return column_dtype(self.fields[col_num]['type'], self.numeric)
+
+    def append(self, rows):
+        """ Convert a page of rows into the buffer """
+
+        start = self.num_rows
+        end = start + len(rows)
+        if end > self.total_rows:
+            raise ValueError("Received more than the expected {0} rows"
+                             .format(self.total_rows))
+
+        columns = flatten_columns(
+            rows_to_columns(rows, len(self.schema_fields)), self.schema_fields)
+        for col_num, (values, field) in enumerate(zip(columns, self.fields)):
+            if field.get('mode') == 'REPEATED':
+                array, mask = convert_repeated(values, field, self.numeric)
+            else:
+                array, mask = convert_column(values, field['type'], self.numeric)
+            if col_num in self._dictionaries:
+                array = self._encode(col_num, array, start)
+            elif field['type'] in ('DATE', 'DATETIME', 'TIMESTAMP'):
+                array = self._dates(col_num, array, start)
+            self._columns[col_num][start:end] = array
+            if self._masks[col_num] is not None:
+                self._masks[col_num][start:end] = mask
+
+        self.num_rows = end
+
+    def _encode(self, col_num, array, start):
+        dictionary = self._dictionaries[col_num]
+
+        page_codes, uniques = pd.factorize(array)
+        mapping = np.array([dictionary.setdefault(value, len(dictionary))
+                            for value in uniques], dtype=np.int32)
+        codes = np.full(len(page_codes), -1, dtype=np.int32)
+        valid = page_codes >= 0
+        codes[valid] = mapping[page_codes[valid]]
+
+        if self.names[col_num] in self._fixed_categorical or \
+                len(dictionary) <= self.categorical_threshold:
+            return codes
+
+        # too many distinct values, fall back to a plain object column
+        column = np.empty(self.total_rows, dtype=object)
+        column[:start] = self._decode(col_num, self._columns[col_num][:start])
+        self._columns[col_num] = column
+        del self._dictionaries[col_num]
+        return array
+
+    def _dates(self, col_num, array, start):
+        column = self._columns[col_num]
+        if array.dtype == column.dtype:
+            return array
+        if column.dtype == np.dtype(object):
+            return _to_objects(array, self.fields[col_num]['type'])
+
+        # a page out of the datetime64[ns] range, fall back to an object
+        # column for the whole result
+        objects = np.empty(self.total_rows, dtype=object)
+        objects[:start] = _to_objects(column[:start], self.fields[col_num]['type'])
+        self._columns[col_num] = objects
+        return array
+
+    def _categories(self, col_num):
+        categories = np.empty(len(self._dictionaries[col_num]), dtype=object)
+        categories[:] = list(self._dictionaries[col_num])
+        return categories
+
+    def _decode(self, col_num, codes):
+        values = self._categories(col_num).take(codes, mode='clip')
+        values[codes < 0] = None
+        return values
+
+    def to_dataframe(self):
+        """ Build a DataFrame on top of the buffered columns """
+
+        columns = []
+        for col_num, (column, mask, field) in enumerate(zip(self._columns,
+                                                            self._masks,
+                                                            self.fields)):
+            if col_num in self._dictionaries:
+                columns.append(pd.Categorical.from_codes(
+                    column[:self.num_rows], self._categories(col_num)))
+            elif field.get('mode') == 'REPEATED':
+                columns.append(column[:self.num_rows])
+            else:
+                columns.append(finalize_column(
+                    column[:self.num_rows],
+                    mask[:self.num_rows] if mask is not None else None,
+                    field['type'], self.dtypes))
+
+        return DataFrame(dict(zip(self.names, columns)),
+                         columns=self.names, copy=False)
+
+
+def _remove_file(filename):
+    try:
+        os.remove(filename)
+    except OSError:
+        pass
+
+
+_DTYPES = {'FLOAT': np.dtype(float),
+           'TIMESTAMP': np.dtype('M8[ns]'),
+           'INTEGER': np.dtype(np.int64),
+           'BOOLEAN': np.dtype(bool),
+           'DATE': np.dtype('M8[ns]'),
+           'DATETIME': np.dtype('M8[ns]'),
+           'TIME': np.dtype('m8[ns]'),
+           'NUMERIC': np.dtype(float),
+           'BIGNUMERIC': np.dtype(float)}
+
+_NUMERIC_TYPES = ('NUMERIC', 'BIGNUMERIC')
+
+_MIN_DATETIME64 = np.datetime64(pd.Timestamp.min.ceil('us'), 'us')
+_MAX_DATETIME64 = np.datetime64(pd.Timestamp.max.floor('us'), 'us')
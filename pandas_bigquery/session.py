@@ -0,0 +1,41 @@
+from pandas_bigquery.gbqconnector import GbqConnector
+
+
+class Session(GbqConnector):
+    """ Credentials and BigQuery services shared by several clients
+
+    The credentials are loaded and the token refreshed once, when the
+    session is created. Clients built with `session=` reuse them, as well
+    as the discovery client of each thread, instead of authenticating and
+    building their own:
+
+        session = Session(project_id, private_key=key_path)
+        tables = Tables(project_id, private_key=key_path, session=session)
+        jobs = Jobs(project_id, private_key=key_path, session=session)
+
+    Parameters
+    ----------
+    project_id : str
+        Google BigQuery Account project ID
+    reauth : boolean
+        Force Google BigQuery to reauthenticate the user
+    verbose : boolean
+        Verbose output
+    private_key : str
+        Service account private key in JSON format, either the path of a
+        file or its contents. Application default or user account
+        credentials are used when None.
+    auth_local_webserver : boolean
+        Use the local webserver flow instead of the console flow when
+        getting user credentials
+    pool_size : int
+        Number of connections of a pool shared by all the threads, see
+        `pandas_bigquery.transport.HttpPool`. When None every thread gets
+        a service and a connection of its own.
+    """
+
+    def __init__(self, project_id, reauth=False, verbose=False,
+                 private_key=None, auth_local_webserver=False, pool_size=None):
+        super(Session, self).__init__(project_id, reauth, verbose,
+                                      private_key, auth_local_webserver,
+                                      pool_size=pool_size)
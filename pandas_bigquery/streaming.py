@@ -0,0 +1,246 @@
+from concurrent.futures import ThreadPoolExecutor
+from pandas import concat
+import threading
+import time
+
+
+class StreamingWriter(object):
+    """ Stream an unbounded sequence of DataFrames into a table
+
+    Frames passed to `write` are buffered and sent in batches with
+    `Tabledata.insert_all`. A batch is sent once it holds `batch_rows`
+    rows or `batch_bytes` bytes, or once its oldest frame has waited
+    `linger` seconds. Batches are sent concurrently by `max_workers`
+    threads, and `write` blocks while the frames buffered or in flight
+    exceed `max_buffer_bytes`, so a fast producer is slowed down to the
+    pace of BigQuery instead of exhausting the memory.
+
+    Errors raised while sending a batch are raised by the next call to
+    `write`, `flush` or `close`.
+
+    Parameters
+    ----------
+    tabledata : Tabledata
+        Client used to send the rows
+    dataset_id : str
+        Name of the BigQuery dataset for the table
+    table_id : str
+        Name of the BigQuery table, which must exist
+    batch_rows : int
+        Number of rows that triggers sending a batch
+    batch_bytes : int
+        In-memory size of the frames that triggers sending a batch
+    linger : float
+        Maximum number of seconds a frame waits before its batch is sent
+    max_workers : int
+        Number of batches sent concurrently
+    max_buffer_bytes : int
+        In-memory size of the frames buffered or in flight above which
+        `write` blocks
+    **kwargs : Arbitrary keyword arguments
+        Passed to `Tabledata.insert_all`, such as max_retries, errors or
+        insert_ids. With errors='report' the rows that could not be
+        inserted are collected in `dead_letters`.
+    """
+
+    def __init__(self, tabledata, dataset_id, table_id, batch_rows=10000,
+                 batch_bytes=16 * 2 ** 20, linger=1., max_workers=4,
+                 max_buffer_bytes=256 * 2 ** 20, **kwargs):
+        self.tabledata = tabledata
+        self.dataset_id = dataset_id
+        self.table_id = table_id
+        self.batch_rows = batch_rows
+        self.batch_bytes = batch_bytes
+        self.linger = linger
+        self.max_buffer_bytes = max_buffer_bytes
+        self.insert_kwargs = kwargs
+        self.dead_letters = []
+
+        self._condition = threading.Condition()
+        self._frames = []
+        self._frames_rows = 0
+        self._frames_bytes = 0
+        self._frames_since = None
+        self._buffered_bytes = 0
+        self._futures = set()
+        self._error = None
+        self._closed = False
+
+        self._start = None
+        self._rows = 0
+        self._batches = 0
+        self._total_latency = 0.
+        self._max_latency = 0.
+
+        self._executor = ThreadPoolExecutor(max_workers)
+        self._lingerer = threading.Thread(target=self._linger)
+        self._lingerer.daemon = True
+        self._lingerer.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, dataframe):
+        """ Buffer the rows of a DataFrame to be sent
+
+        Blocks while the buffered frames exceed `max_buffer_bytes`.
+
+        Parameters
+        ----------
+        dataframe : DataFrame
+            Rows to be inserted
+        """
+
+        if len(dataframe) == 0:
+            return
+
+        num_bytes = int(dataframe.memory_usage(index=True, deep=True).sum())
+
+        with self._condition:
+            self._check()
+            # a single frame larger than the cap is let through alone
+            while self._buffered_bytes > 0 and \
+                    self._buffered_bytes + num_bytes > self.max_buffer_bytes:
+                self._condition.wait()
+                self._check()
+
+            if self._start is None:
+                self._start = time.time()
+            if self._frames_since is None:
+                self._frames_since = time.time()
+            self._frames.append(dataframe)
+            self._frames_rows += len(dataframe)
+            self._frames_bytes += num_bytes
+            self._buffered_bytes += num_bytes
+
+            if self._frames_rows >= self.batch_rows or \
+                    self._frames_bytes >= self.batch_bytes:
+                self._send()
+            self._condition.notify_all()
+
+    def write_all(self, dataframes):
+        """ Write every DataFrame of an iterable, see `write`
+
+        Parameters
+        ----------
+        dataframes : iterable
+            DataFrames to be inserted
+        """
+
+        for dataframe in dataframes:
+            self.write(dataframe)
+
+    def flush(self):
+        """ Send the buffered frames and wait until every batch is sent """
+
+        with self._condition:
+            self._check()
+            if self._frames:
+                self._send()
+            while self._futures:
+                self._condition.wait()
+            self._check()
+
+    def close(self):
+        """ Flush the buffered frames and stop the writer """
+
+        if self._closed:
+            return
+
+        try:
+            self.flush()
+        finally:
+            with self._condition:
+                self._closed = True
+                self._condition.notify_all()
+            self._lingerer.join()
+            self._executor.shutdown(wait=True)
+
+    @property
+    def stats(self):
+        """ Counters of the rows sent so far
+
+        Returns
+        -------
+        dict
+            rows, batches, rows_per_second since the first write, mean and
+            max latency in seconds between a frame being buffered and its
+            batch being acknowledged, bytes currently buffered or in
+            flight, and the number of dead letters
+        """
+
+        with self._condition:
+            elapsed = time.time() - self._start if self._start else 0.
+            return {
+                'rows': self._rows,
+                'batches': self._batches,
+                'rows_per_second': self._rows / elapsed if elapsed else 0.,
+                'mean_latency': self._total_latency / self._batches if self._batches else 0.,
+                'max_latency': self._max_latency,
+                'buffered_bytes': self._buffered_bytes,
+                'dead_letters': len(self.dead_letters)
+            }
+
+    def _check(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+        if self._closed:
+            raise ValueError("The StreamingWriter is closed")
+
+    def _send(self):
+        # called with the condition held
+        frames, num_rows = self._frames, self._frames_rows
+        num_bytes, since = self._frames_bytes, self._frames_since
+        self._frames = []
+        self._frames_rows = 0
+        self._frames_bytes = 0
+        self._frames_since = None
+
+        future = self._executor.submit(self._insert, frames)
+        self._futures.add(future)
+        future.add_done_callback(
+            lambda done: self._sent(done, num_rows, num_bytes, since))
+
+    def _insert(self, frames):
+        # frames are concatenated in the worker, without holding the lock
+        batch = concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        return self.tabledata.insert_all(batch, self.dataset_id, self.table_id,
+                                         **self.insert_kwargs)
+
+    def _sent(self, future, num_rows, num_bytes, since):
+        with self._condition:
+            self._futures.discard(future)
+            self._buffered_bytes -= num_bytes
+
+            error = future.exception()
+            if error is not None:
+                if self._error is None:
+                    self._error = error
+            else:
+                self.dead_letters.extend(future.result() or [])
+                self._rows += num_rows
+                self._batches += 1
+                latency = time.time() - since
+                self._total_latency += latency
+                self._max_latency = max(self._max_latency, latency)
+
+            self._condition.notify_all()
+
+    def _linger(self):
+        with self._condition:
+            while not self._closed:
+                if self._frames_since is None:
+                    self._condition.wait()
+                    continue
+
+                remaining = self._frames_since + self.linger - time.time()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                elif self._error is None:
+                    self._send()
+                else:
+                    self._condition.wait()
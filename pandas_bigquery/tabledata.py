@@ -1,69 +1,480 @@
+from pandas_bigquery.exceptions import *
 from pandas_bigquery.gbqconnector import GbqConnector
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pandas.util import hash_pandas_object
 from time import sleep
 import json
+import os
 import uuid
 
 
 class Tabledata(GbqConnector):
-    def __init__(self, project_id, reauth=False, verbose=False, private_key=None):
+    def __init__(self, project_id, reauth=False, verbose=False, private_key=None, session=None):
         try:
             from googleapiclient.errors import HttpError
         except:
             from apiclient.errors import HttpError
         self.http_error = HttpError
-        super(Tabledata, self).__init__(project_id, reauth, verbose, private_key)
+        super(Tabledata, self).__init__(project_id, reauth, verbose, private_key, session=session)
 
-    def insert_all(self, dataframe, dataset_id, table_id, chunksize=500):
+    # insertAll requests are limited to 10 MB, leave room for the JSON
+    # escaping done by the client and the request envelope
+    max_request_bytes = 5 * 2 ** 20
+
+    # insertAll reasons worth resending a row for, 'stopped' rows were only
+    # rejected because another row of the same request was invalid
+    retriable_reasons = ('backendError', 'internalError', 'stopped', 'timeout')
+
+    # HTTP statuses of insertAll requests worth resending as a whole
+    retriable_statuses = (500, 502, 503, 504)
+
+    def insert_all(self, dataframe, dataset_id, table_id, chunksize=10000,
+                   max_workers=1, max_in_flight=None, max_bytes=None,
+                   max_retries=0, retry_delay=1., errors='raise',
+                   insert_ids=None, checkpoint=None):
+        """ Stream the rows of a DataFrame into a table with insertAll
+
+        Parameters
+        ----------
+        dataframe : DataFrame
+            Rows to be inserted
+        dataset_id : str
+            Name of the BigQuery dataset for the table
+        table_id : str
+            Name of the BigQuery table
+        chunksize : int
+            Maximum number of rows sent in each insertAll request
+        max_workers : int
+            Number of threads sending requests concurrently, each one
+            using its own connection. With 1 every request is sent from
+            the calling thread.
+        max_in_flight : int
+            Maximum number of chunks serialized and waiting for their
+            response, 2 * max_workers by default. Responses are processed
+            in chunk order, so progress and errors are reported as if the
+            chunks were sent one after the other.
+        max_bytes : int
+            Target size of the encoded rows of each request,
+            `max_request_bytes` by default. The number of rows of each
+            chunk is derived from the average row size of the previous
+            chunks, see `iter_chunks`.
+        max_retries : int
+            Number of times the rows rejected with a retriable reason, see
+            `retriable_reasons`, are sent again. Only the failed rows of a
+            chunk are resent, with their original insertId so that BigQuery
+            drops any duplicate. Requests failing with a 5xx status are
+            resent whole.
+        retry_delay : float
+            Seconds to wait before the first retry, doubled at each retry
+        errors : str
+            'raise' to raise StreamingInsertError for the rows that could
+            not be inserted, or 'report' to return them and carry on with
+            the remaining chunks
+        insert_ids : str
+            How the insertId of the rows is built. None numbers the rows
+            after a random prefix, so every call sends new ids. 'hash'
+            derives each id from a hash of the row and its index label,
+            and any other value is the name of a column holding a unique
+            key. Deterministic ids let BigQuery drop the rows sent again
+            by a re-run of the same upload.
+        checkpoint : str
+            Path of a file recording the number of rows acknowledged so
+            far. When the file exists, the rows it covers are skipped, so
+            an interrupted upload resumes where it stopped. It requires
+            deterministic insert_ids, so that the chunks in flight when the
+            upload stopped are deduplicated when sent again. The file is
+            kept once the upload is complete.
+
+        Returns
+        -------
+        list(dict)
+            The rows that could not be inserted, as dead letters of the
+            form {'index': ..., 'insertId': ..., 'json': {...},
+            'errors': [...]}, where index is the position of the row in
+            the DataFrame. Always empty when errors is 'raise'.
+        """
+
+        if errors not in ('raise', 'report'):
+            raise ValueError("'{0}' is not valid for errors".format(errors))
+
+        if checkpoint is not None and insert_ids is None:
+            raise ValueError("checkpoint needs deterministic insert_ids, "
+                             "'hash' or the name of a key column")
+
+        insert_id_prefix = uuid.uuid4().hex if insert_ids is None else ''
+        total_rows = len(dataframe)
+        max_in_flight = max_in_flight or 2 * max_workers
+
+        first_row = 0
+        if checkpoint is not None:
+            first_row = self._read_checkpoint(checkpoint, dataset_id, table_id,
+                                              total_rows)
+
+        self._print("\n\n")
+
+        dead_letters = []
+        executor = ThreadPoolExecutor(max_workers) if max_workers > 1 else None
+        pending = deque()
+        try:
+            for start, rows in self.iter_chunks(dataframe, insert_id_prefix, chunksize,
+                                                max_bytes or self.max_request_bytes,
+                                                insert_ids, first_row):
+                args = (dataset_id, table_id, start, rows, max_retries,
+                        retry_delay)
+                if executor is not None:
+                    response = executor.submit(self._insert_chunk, *args)
+                else:
+                    response = Future()
+                    response.set_result(self._insert_chunk(*args))
+                pending.append((start + len(rows), response))
+
+                if len(pending) >= max_in_flight:
+                    dead_letters.extend(self._process_response(
+                        total_rows, *pending.popleft(), errors=errors,
+                        checkpoint=checkpoint, destination=(dataset_id, table_id)))
+
+            while pending:
+                dead_letters.extend(self._process_response(
+                    total_rows, *pending.popleft(), errors=errors,
+                    checkpoint=checkpoint, destination=(dataset_id, table_id)))
+        finally:
+            if executor is not None:
+                for _, response in pending:
+                    response.cancel()
+                executor.shutdown(wait=True)
+
+        self._print("\n")
+
+        return dead_letters
+
+    def _insert_rows(self, dataset_id, table_id, rows, retry=False):
         try:
             from googleapiclient.errors import HttpError
         except:
             from apiclient.errors import HttpError
 
-        job_id = uuid.uuid4().hex
-        rows = []
-        remaining_rows = len(dataframe)
+        body = {'rows': rows}
 
-        total_rows = remaining_rows
-        self._print("\n\n")
+        try:
+            return self.service.tabledata().insertAll(
+                projectId=self.project_id,
+                datasetId=dataset_id,
+                tableId=table_id,
+                body=body).execute()
+        except HttpError as ex:
+            if retry and ex.resp.status in self.retriable_statuses:
+                return None
+            self.process_http_error(ex)
 
-        for index, row in dataframe.reset_index(drop=True).iterrows():
-            row_dict = dict()
-            row_dict['json'] = json.loads(row.to_json(force_ascii=False,
-                                                      date_unit='s',
-                                                      date_format='iso'))
-            row_dict['insertId'] = job_id + str(index)
-            rows.append(row_dict)
-            remaining_rows -= 1
-
-            if (len(rows) % chunksize == 0) or (remaining_rows == 0):
-                self._print("\rStreaming Insert is {0}% Complete".format(
-                    ((total_rows - remaining_rows) * 100) / total_rows))
-
-                body = {'rows': rows}
-
-                try:
-                    response = self.service.tabledata().insertAll(
-                        projectId=self.project_id,
-                        datasetId=dataset_id,
-                        tableId=table_id,
-                        body=body).execute()
-                except HttpError as ex:
-                    self.process_http_error(ex)
-
-                # For streaming inserts, even if you receive a success HTTP
-                # response code, you'll need to check the insertErrors property
-                # of the response to determine if the row insertions were
-                # successful, because it's possible that BigQuery was only
-                # partially successful at inserting the rows.  See the `Success
-                # HTTP Response Codes
-                # <https://cloud.google.com/bigquery/
-                #       streaming-data-into-bigquery#troubleshooting>`__
-                # section
-
-                insert_errors = response.get('insertErrors', None)
-                if insert_errors:
-                    self.process_insert_errors(insert_errors)
-
-                rows = []
+    def _insert_chunk(self, dataset_id, table_id, start, rows, max_retries,
+                      retry_delay):
+        # returns the dead letters of the chunk, the rows still failing once
+        # the retries are exhausted
+        dead_letters = []
+        indexes = list(range(start, start + len(rows)))
 
-        self._print("\n")
+        for attempt in range(max_retries + 1):
+            if attempt > 0:
+                sleep(retry_delay * 2 ** (attempt - 1))
+
+            retry = attempt < max_retries
+            response = self._insert_rows(dataset_id, table_id, rows, retry)
+            if response is None:
+                continue
+
+            retry_rows = []
+            retry_indexes = []
+            for insert_error in response.get('insertErrors', []):
+                row_num = insert_error['index']
+                row_errors = insert_error.get('errors', [])
+                if retry and all(error.get('reason') in self.retriable_reasons
+                                 for error in row_errors):
+                    retry_rows.append(rows[row_num])
+                    retry_indexes.append(indexes[row_num])
+                else:
+                    dead_letters.append({'index': indexes[row_num],
+                                         'insertId': rows[row_num]['insertId'],
+                                         'json': rows[row_num]['json'],
+                                         'errors': row_errors})
+
+            rows, indexes = retry_rows, retry_indexes
+            if not rows:
+                break
+
+        return dead_letters
+
+    def _process_response(self, total_rows, inserted_rows, response,
+                          errors='raise', checkpoint=None, destination=None):
+        dead_letters = response.result()
+
+        self._print("\rStreaming Insert is {0}% Complete".format(
+            (inserted_rows * 100) / total_rows))
+
+        # For streaming inserts, even if you receive a success HTTP
+        # response code, you'll need to check the insertErrors property
+        # of the response to determine if the row insertions were
+        # successful, because it's possible that BigQuery was only
+        # partially successful at inserting the rows.  See the `Success
+        # HTTP Response Codes
+        # <https://cloud.google.com/bigquery/
+        #       streaming-data-into-bigquery#troubleshooting>`__
+        # section
+
+        if dead_letters and errors == 'raise':
+            self.process_insert_errors(dead_letters)
+
+        # responses are processed in chunk order, every row before
+        # inserted_rows has been acknowledged
+        if checkpoint is not None:
+            self._write_checkpoint(checkpoint, destination[0], destination[1],
+                                   total_rows, inserted_rows)
+
+        return dead_letters
+
+    @staticmethod
+    def _read_checkpoint(checkpoint, dataset_id, table_id, total_rows):
+        if not os.path.exists(checkpoint):
+            return 0
+
+        with open(checkpoint) as f:
+            state = json.load(f)
+
+        if state.get('table') != '{0}.{1}'.format(dataset_id, table_id) \
+                or state.get('total_rows') != total_rows:
+            raise ValueError("Checkpoint {0} was written by an upload of {1} "
+                             "rows to {2}".format(checkpoint,
+                                                  state.get('total_rows'),
+                                                  state.get('table')))
+
+        return state['rows']
+
+    @staticmethod
+    def _write_checkpoint(checkpoint, dataset_id, table_id, total_rows, rows):
+        # written aside and renamed, so a crash never leaves a partial file
+        temporary_path = checkpoint + '.tmp'
+        with open(temporary_path, 'w') as f:
+            json.dump({'table': '{0}.{1}'.format(dataset_id, table_id),
+                       'total_rows': total_rows,
+                       'rows': rows}, f)
+        os.replace(temporary_path, checkpoint)
+
+    @staticmethod
+    def iter_chunks(dataframe, insert_id_prefix, chunksize, max_bytes,
+                    insert_ids=None, start=0):
+        """ Split a DataFrame into insertAll chunks by encoded size
+
+        The number of rows of each chunk is derived from the average
+        encoded row size seen so far, so narrow frames are sent in few
+        large requests and wide ones stay below the request size limit.
+        A chunk exceeding `max_bytes` is halved until it fits, or until
+        it holds a single row.
+
+        Parameters
+        ----------
+        dataframe : DataFrame
+            Rows to be serialized
+        insert_id_prefix : str
+            Prefix of the insertId of every row
+        chunksize : int
+            Maximum number of rows of a chunk
+        max_bytes : int
+            Target size of the encoded rows of a chunk
+        insert_ids : str
+            None, 'hash' or the name of a key column, see `serialize_rows`
+        start : int
+            Position of the first row to serialize
+
+        Returns
+        -------
+        generator
+            Tuples of the position of the chunk in the DataFrame and its
+            rows, see `serialize_rows`
+        """
+
+        total_rows = len(dataframe)
+        row_bytes = None
+
+        while start < total_rows:
+            num_rows = chunksize
+            if row_bytes:
+                num_rows = max(1, min(chunksize, int(max_bytes / row_bytes)))
+
+            while True:
+                rows, num_bytes = Tabledata._serialize_chunk(
+                    dataframe.iloc[start:start + num_rows], insert_id_prefix, start,
+                    insert_ids)
+                if num_bytes <= max_bytes or len(rows) == 1:
+                    break
+                num_rows = len(rows) // 2
+
+            row_bytes = float(num_bytes) / len(rows)
+            yield start, rows
+            start += len(rows)
+
+    @staticmethod
+    def serialize_rows(chunk, insert_id_prefix, offset=0, insert_ids=None):
+        """ Build the insertAll rows of a chunk of a DataFrame
+
+        The whole chunk is encoded with a single to_json call.
+
+        Parameters
+        ----------
+        chunk : DataFrame
+            Rows to be serialized
+        insert_id_prefix : str
+            Prefix of the insertId of every row
+        offset : int
+            Position of the chunk in the DataFrame, used to number the
+            insertIds
+        insert_ids : str
+            None to number the insertIds, 'hash' to derive them from a
+            hash of each row and its index label, or the name of a column
+            holding a unique key. Hashes are computed for the whole chunk
+            at once with `pandas.util.hash_pandas_object`.
+
+        Returns
+        -------
+        list(dict)
+            The rows, of the form {'json': {...}, 'insertId': '...'}
+        """
+
+        return Tabledata._serialize_chunk(chunk, insert_id_prefix, offset,
+                                          insert_ids)[0]
+
+    @staticmethod
+    def _serialize_chunk(chunk, insert_id_prefix, offset, insert_ids=None):
+        encoded = chunk.to_json(orient='records',
+                                force_ascii=False,
+                                date_unit='s',
+                                date_format='iso')
+
+        if insert_ids is None:
+            keys = [str(offset + row_num) for row_num in range(len(chunk))]
+        elif insert_ids == 'hash':
+            keys = ['{0:016x}'.format(key)
+                    for key in hash_pandas_object(chunk).values]
+        else:
+            keys = chunk[insert_ids].astype(str).tolist()
+
+        rows = [{'json': record, 'insertId': insert_id_prefix + key}
+                for record, key in zip(json.loads(encoded), keys)]
+
+        # the client escapes non ASCII characters when sending the request
+        num_bytes = len(encoded.encode('ascii', 'backslashreplace')) + \
+            sum(len(row['insertId']) for row in rows) + len(rows) * 32
+
+        return rows, num_bytes
+
+    def list(self, dataset_id, table_id, selected_fields=None, start_index=0,
+             max_rows=None, max_workers=1, page_size=None, prefetch=0):
+        """ Read the rows of a table without running a query
+
+        Rows are read through the tabledata.list endpoint, which is not
+        billed and does not need a query slot.
+
+        Parameters
+        ----------
+        dataset_id : str
+            Name of the BigQuery dataset for the table
+        table_id : str
+            Name of the BigQuery table
+        selected_fields : list(str)
+            Names of the top level fields to read, all fields if None.
+            Fields are returned in the order of the table schema.
+        start_index : int
+            Index of the first row to read
+        max_rows : int
+            Maximum number of rows to read, all the remaining rows if None
+        max_workers : int
+            Number of concurrent page fetchers. With more than one worker,
+            the rows after the first page are split into startIndex ranges
+            and downloaded in parallel, see `GbqConnector.fetch_ranges`
+        page_size : int
+            Number of rows requested by each fetcher at a time. Defaults
+            to the size of the first page returned by BigQuery.
+        prefetch : int
+            Number of pages fetched ahead by a background thread while
+            the caller processes the current page
+
+        Returns
+        -------
+        tuple
+            The schema of the selected fields, the number of rows to be
+            read and a generator yielding the pages of rows in order
+        """
+
+        try:
+            from googleapiclient.errors import HttpError
+        except:
+            from apiclient.errors import HttpError
+
+        try:
+            table = self.service.tables().get(
+                projectId=self.project_id,
+                datasetId=dataset_id,
+                tableId=table_id).execute()
+        except HttpError as ex:
+            self.process_http_error(ex)
+
+        fields = table['schema']['fields']
+        if selected_fields is not None:
+            missing = set(selected_fields) - set(field['name'] for field in fields)
+            if missing:
+                raise ValueError("Fields not found in {0}.{1}: {2}".format(
+                    dataset_id, table_id, ', '.join(sorted(missing))))
+            fields = [field for field in fields
+                      if field['name'] in selected_fields]
+
+        end_index = int(table.get('numRows', 0))
+        if max_rows is not None:
+            end_index = min(end_index, start_index + max_rows)
+        total_rows = max(end_index - start_index, 0)
+
+        def fetch_page(service, index, max_results):
+            request = dict(projectId=self.project_id,
+                           datasetId=dataset_id,
+                           tableId=table_id,
+                           startIndex=index,
+                           maxResults=max_results)
+            if selected_fields is not None:
+                request['selectedFields'] = ','.join(
+                    field['name'] for field in fields)
+            try:
+                return service.tabledata().list(**request).execute() \
+                    .get('rows', [])
+            except HttpError as ex:
+                self.process_http_error(ex)
+
+        pages = self._iter_table_pages(fetch_page, start_index, end_index,
+                                       max_workers, page_size)
+        if prefetch > 0:
+            pages = self.prefetch(pages, prefetch)
+
+        return {'fields': fields}, total_rows, pages
+
+    def _iter_table_pages(self, fetch_page, start_index, end_index,
+                          max_workers, page_size):
+        current_row = start_index
+
+        while current_row < end_index:
+            max_results = end_index - current_row
+            if page_size is not None:
+                max_results = min(page_size, max_results)
+
+            page = fetch_page(self.service, current_row, max_results)
+            if not page:
+                raise GenericGBQException(
+                    "Expected {0} rows, received {1}".format(
+                        end_index - start_index, current_row - start_index))
+
+            current_row += len(page)
+            yield page
+
+            if max_workers > 1 and current_row < end_index:
+                for page in self.fetch_ranges(fetch_page, current_row,
+                                              end_index,
+                                              page_size or len(page),
+                                              max_workers):
+                    yield page
+                return
@@ -5,13 +5,13 @@ from time import sleep
 
 
 class Tables(GbqConnector):
-    def __init__(self, project_id, reauth=False, verbose=False, private_key=None):
+    def __init__(self, project_id, reauth=False, verbose=False, private_key=None, session=None):
         try:
             from googleapiclient.errors import HttpError
         except:
             from apiclient.errors import HttpError
         self.http_error = HttpError
-        super(Tables, self).__init__(project_id, reauth, verbose, private_key)
+        super(Tables, self).__init__(project_id, reauth, verbose, private_key, session=session)
 
     def insert(self, dataset_id, table_id, schema, **kwargs):
         """ Create a table in Google BigQuery given a table and schema
@@ -40,10 +40,10 @@ class Tables(GbqConnector):
             raise TableCreationError("Table {0} already "
                                      "exists".format(table_id))
 
-        if not Datasets(self.project_id,
-                        private_key=self.private_key).exists(dataset_id):
-            Datasets(self.project_id,
-                     private_key=self.private_key).insert(dataset_id)
+        datasets = Datasets(self.project_id, private_key=self.private_key,
+                            session=self.session)
+        if not datasets.exists(dataset_id):
+            datasets.insert(dataset_id)
 
         body = {
             'schema': schema,
@@ -91,6 +91,34 @@ class Tables(GbqConnector):
             if ex.resp.status != 404:
                 self.process_http_error(ex)
 
+    def delete_many(self, dataset_id, table_ids, errors='raise'):
+        """ Delete many tables, sending the requests in batches
+
+        Parameters
+        ----------
+        dataset_id : str
+            Name of dataset containing the tables to be deleted
+        table_ids : list
+            Names of the tables to be deleted
+        errors : str
+            'raise' to raise the first error once every request is sent,
+            or 'report' to return the errors as the result of their table
+
+        Returns
+        -------
+        dict
+            True for the tables deleted, False for those that did not
+            exist, keyed by table name
+        """
+
+        requests = [self.service.tables().delete(
+            datasetId=dataset_id,
+            projectId=self.project_id,
+            tableId=table_id) for table_id in table_ids]
+
+        return self._execute_many(table_ids, requests,
+                                  lambda response: True, False, errors)
+
     def list(self, dataset_id):
         """ List tables in the specific dataset in Google BigQuery
 
@@ -164,6 +192,34 @@ class Tables(GbqConnector):
         except HttpError as ex:
             self.process_http_error(ex)
 
+    def get_many(self, dataset_id, table_ids, errors='raise'):
+        """Retrieve the resources describing many tables, sending the
+        requests in batches
+
+        Parameters
+        ----------
+        dataset_id : str
+            Name of the BigQuery dataset for the tables
+        table_ids : list
+            Names of the BigQuery tables
+        errors : str
+            'raise' to raise the first error once every request is sent,
+            or 'report' to return the errors as the result of their table
+
+        Returns
+        -------
+        dict
+            Table resources keyed by table name
+        """
+
+        requests = [self.service.tables().get(
+            projectId=self.project_id,
+            datasetId=dataset_id,
+            tableId=table_id) for table_id in table_ids]
+
+        return self._execute_many(table_ids, requests,
+                                  lambda response: response, errors=errors)
+
     def get_schema(self, dataset_id, table_id):
         """Retrieve the schema of the table
 
@@ -257,8 +313,30 @@ class Tables(GbqConnector):
             Whether the passed schema is a subset
         """
 
+        return Tables.fields_are_subset(self.get_schema(dataset_id, table_id),
+                                        schema)
+
+    @staticmethod
+    def fields_are_subset(fields, schema):
+        """ Indicate whether every field of a schema is among the fields
+        of a table, see `schema_is_subset`
+
+        Parameters
+        ----------
+        fields : list(dict)
+            Fields of the table, each one with a 'name' and a 'type'
+        schema : dict
+            Schema for comparison, as generate_schema_from_dataframe
+            returns it
+
+        Returns
+        -------
+        bool
+            Whether the schema is a subset of the fields
+        """
+
         fields_remote = [{'name': f['name'].lower(), 'type': f['type']}
-                         for f in self.get_schema(dataset_id, table_id)]
+                         for f in fields]
         fields_local = [{'name': f['name'].lower(), 'type': f['type']}
                         for f in schema['fields']]
 
@@ -327,6 +405,173 @@ class Tables(GbqConnector):
             else:
                 self.process_http_error(ex)
 
+    def exists_many(self, dataset_id, table_ids, errors='raise'):
+        """ Check if many tables exist, sending the requests in batches
+
+        Parameters
+        ----------
+        dataset_id : str
+            Dataset name of the tables to be verified
+        table_ids : list
+            Names of the tables to be verified
+        errors : str
+            'raise' to raise the first error once every request is sent,
+            or 'report' to return the errors as the result of their table
+
+        Returns
+        -------
+        dict
+            True for the tables that exist, otherwise False, keyed by
+            table name
+        """
+
+        # like `exists`, a partition is checked through its table
+        requests = [self.service.tables().get(
+            projectId=self.project_id,
+            datasetId=dataset_id,
+            tableId=table_id.rsplit('$', 1)[0]) for table_id in table_ids]
+
+        return self._execute_many(table_ids, requests,
+                                  lambda response: True, False, errors)
+
+    def list_partitions(self, dataset_id, table_id):
+        """ List the partitions of a partitioned table
+
+        The partitions are read from the $__PARTITIONS_SUMMARY__
+        meta-table by a legacy SQL query job. The meta-table does not
+        see the rows still in the streaming buffer, so a partition that
+        only holds streamed rows may be missing. Use
+        `partition_exists_many` to check a known set of partitions.
+
+        Parameters
+        ----------
+        dataset_id : str
+            Name of the BigQuery dataset for the table
+        table_id : str
+            Name of the BigQuery table
+
+        Returns
+        -------
+        list
+            Sorted partition ids, such as '20170101'
+        """
+
+        try:
+            from googleapiclient.errors import HttpError
+        except:
+            from apiclient.errors import HttpError
+
+        job_collection = self.service.jobs()
+        partitions = []
+
+        try:
+            query_reply = job_collection.query(
+                projectId=self.project_id,
+                body={
+                    'query': 'SELECT partition_id FROM [{0}.{1}${2}]'.format(
+                        dataset_id, table_id, '__PARTITIONS_SUMMARY__'),
+                    'useLegacySql': True
+                }).execute()
+            job_reference = query_reply['jobReference']
+
+            while True:
+                if query_reply.get('jobComplete', False):
+                    partitions.extend(row['f'][0]['v'] for row in query_reply.get('rows', []))
+                    if not query_reply.get('pageToken'):
+                        break
+
+                query_reply = job_collection.getQueryResults(
+                    projectId=job_reference['projectId'],
+                    jobId=job_reference['jobId'],
+                    pageToken=query_reply.get('pageToken')).execute()
+        except HttpError as ex:
+            self.process_http_error(ex)
+
+        return sorted(partitions)
+
+    def partition_exists(self, dataset_id, table_id):
+        """ Check if a partition holds any row
+
+        The check reads the metadata of the decorated table, which needs
+        no query job. Use `list_partitions` to check many partitions of
+        the same table.
+
+        Parameters
+        ----------
+        dataset_id : str
+            Name of the BigQuery dataset for the table
+        table_id : str
+            Name of the partition, as table$YYYYMMDD
+
+        Returns
+        -------
+        boolean
+            true if the partition exists, otherwise false
+        """
+
+        if not Tables.contains_partition_decorator(table_id):
+            raise ValueError("'{0}' is not a partition, it should be of "
+                             "the form 'tableId$YYYYMMDD'".format(table_id))
+
+        try:
+            resource = self.service.tables().get(
+                projectId=self.project_id,
+                datasetId=dataset_id,
+                tableId=table_id).execute()
+        except self.http_error as ex:
+            if ex.resp.status == 404:
+                return False
+            self.process_http_error(ex)
+
+        return Tables._holds_rows(resource)
+
+    def partition_exists_many(self, dataset_id, table_ids, errors='raise'):
+        """ Check if many partitions hold any row, sending the requests
+        in batches
+
+        Like `partition_exists`, the check reads the metadata of each
+        decorated table, counting the rows in the streaming buffer, and
+        needs no query job.
+
+        Parameters
+        ----------
+        dataset_id : str
+            Name of the BigQuery dataset for the table
+        table_ids : list
+            Names of the partitions, as table$YYYYMMDD
+        errors : str
+            'raise' to raise the first error once every request is sent,
+            or 'report' to return the errors as the result of their
+            partition
+
+        Returns
+        -------
+        dict
+            True for the partitions holding rows, otherwise False, keyed
+            by partition name
+        """
+
+        for table_id in table_ids:
+            if not Tables.contains_partition_decorator(table_id):
+                raise ValueError("'{0}' is not a partition, it should be of "
+                                 "the form 'tableId$YYYYMMDD'".format(table_id))
+
+        requests = [self.service.tables().get(
+            projectId=self.project_id,
+            datasetId=dataset_id,
+            tableId=table_id) for table_id in table_ids]
+
+        return self._execute_many(table_ids, requests, Tables._holds_rows,
+                                  False, errors)
+
+    @staticmethod
+    def _holds_rows(resource):
+        # numRows ignores the rows still in the streaming buffer
+        num_rows = int(resource.get('numRows', 0))
+        num_rows += int(resource.get('streamingBuffer', {}).get('estimatedRows', 0))
+
+        return num_rows > 0
+
     def delete_and_recreate_table(self, dataset_id, table_id, table_schema):
         delay = 0
 
@@ -341,7 +586,8 @@ class Tables(GbqConnector):
                         'wait 2 minutes. See Google BigQuery issue #191')
             delay = 120
 
-        table = Tables(self.project_id, private_key=self.private_key)
+        table = Tables(self.project_id, private_key=self.private_key,
+                       session=self.session)
         table.delete(dataset_id, table_id)
         table.insert(dataset_id, table_id, table_schema)
         sleep(delay)
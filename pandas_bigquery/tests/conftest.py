@@ -0,0 +1,21 @@
+import pytest
+
+
+class FakeSession(object):
+    """ Session handing a fake service to the connectors built on it """
+
+    credentials = None
+
+    def __init__(self, service):
+        self.service = service
+
+
+@pytest.fixture
+def make_connector():
+    """ Build a connector sending its requests to a fake service, such as
+    make_connector(Tables, service) """
+
+    def make(connector_class, service):
+        return connector_class('project', session=FakeSession(service))
+
+    return make
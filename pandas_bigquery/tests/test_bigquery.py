@@ -120,6 +120,16 @@ class TestTableOperations(object):
     def teardown_method(self, method):
         pass
 
+    def test_sub_clients_share_session(self):
+        session = self.bigquery.session
+
+        assert self.bigquery.tables.session is session
+        assert self.bigquery.jobs.credentials is session.credentials
+        assert self.bigquery.tabledata.service is session.service
+
+        other = Bigquery(_get_project_id(), _get_private_key_path(), session=session)
+        assert other.datasets.service is session.service
+
     def test_table_create(self):
         test_id = "1"
         test_size = 10
@@ -201,6 +211,56 @@ class TestTableOperations(object):
         assert result['num_rows'][0] == test_size
 
 
+    def test_read_table(self):
+        test_id = "6"
+        test_size = 100
+        df = make_mixed_dataframe_v2(test_size)
+
+        self.bigquery.upload(df, self.destination_table + test_id)
+
+        result = self.bigquery.read_table(self.dataset_prefix, TABLE_ID + test_id,
+                                          selected_fields=['ints', 'flts'], max_workers=4)
+
+        assert list(result.columns) == ['flts', 'ints']
+        assert len(result) == test_size
+
+        result = self.bigquery.read_table(self.dataset_prefix, TABLE_ID + test_id,
+                                          start_index=90, max_rows=20)
+
+        assert len(result) == 10
+
+    def test_upload_data_concurrently(self):
+        test_id = "7"
+        test_size = 1000
+        df = make_mixed_dataframe_v2(test_size)
+
+        self.bigquery.upload(df, self.destination_table + test_id, chunksize=100, max_workers=4)
+
+        result = self.bigquery.query(
+            "SELECT COUNT(*) as num_rows FROM {0}".format(
+                self.destination_table + test_id), strict=False, priority='INTERACTIVE')
+        assert result['num_rows'][0] == test_size
+
+    def test_upload_data_with_load_job(self):
+        test_id = "8"
+        test_size = 1000
+        df = make_mixed_dataframe_v2(test_size)
+
+        self.bigquery.upload(df, self.destination_table + test_id, method='load')
+        self.bigquery.upload(df, self.destination_table + test_id, if_exists='append', method='load')
+
+        result = self.bigquery.query(
+            "SELECT COUNT(*) as num_rows FROM {0}".format(
+                self.destination_table + test_id), strict=False, priority='INTERACTIVE')
+        assert result['num_rows'][0] == test_size * 2
+
+        self.bigquery.upload(df, self.destination_table + test_id, if_exists='replace', method='load')
+
+        result = self.bigquery.query(
+            "SELECT COUNT(*) as num_rows FROM {0}".format(
+                self.destination_table + test_id), strict=False, priority='INTERACTIVE')
+        assert result['num_rows'][0] == test_size
+
 class TestPartitionedTableOperations(object):
     @classmethod
     def setup_class(cls):
@@ -399,6 +459,41 @@ class TestPartitionedTableOperations(object):
 
         assert result['num_rows'][0] == test_size
 
+    def test_partition_exists(self):
+        test_id = "8"
+        test_size = 10
+        df = make_mixed_dataframe_v2(test_size)
+        today = datetime.today().strftime("%Y%m%d")
+        yesterday = (datetime.today() - timedelta(days=1)).strftime("%Y%m%d")
+
+        schema = self.bigquery.generate_schema(df)
+        self.bigquery.table_create(self.dataset_prefix, TABLE_ID + test_id, schema, body={
+            'timePartitioning': {'type': 'DAY'}
+        })
+
+        self.bigquery.upload(df, self.destination_table + test_id + '$' + today, method='load')
+
+        assert self.bigquery.tables.partition_exists(self.dataset_prefix, TABLE_ID + test_id + '$' + today)
+        assert not self.bigquery.tables.partition_exists(self.dataset_prefix, TABLE_ID + test_id + '$' + yesterday)
+        assert self.bigquery.tables.list_partitions(self.dataset_prefix, TABLE_ID + test_id) == [today]
+
+    def test_upload_partitioned(self):
+        test_id = "9"
+        test_size = 30
+        df = make_mixed_dataframe_v2(test_size)
+        days = [(datetime.today() - timedelta(days=day)).strftime("%Y%m%d") for day in range(3)]
+        df['day'] = [datetime.strptime(days[row % 3], "%Y%m%d") for row in range(test_size)]
+
+        report = self.bigquery.upload_partitioned(df, self.destination_table + test_id, 'day', max_workers=3)
+
+        assert sorted(report.index) == sorted(days)
+        assert report['num_rows'].sum() == test_size
+        assert report['error'].isnull().all()
+        assert self.bigquery.tables.list_partitions(self.dataset_prefix, TABLE_ID + test_id) == sorted(days)
+
+        with pytest.raises(TableCreationError):
+            self.bigquery.upload_partitioned(df, self.destination_table + test_id, 'day')
+
 
 class TestQueries(object):
     @classmethod
@@ -541,3 +636,28 @@ class TestQueries(object):
                                                    priority='INTERACTIVE')
 
         assert result['num_rows'][0] == test_size and attempts == 1
+
+    def test_run_query_iter(self):
+        test_id = "9"
+        test_size = 10
+        df = make_mixed_dataframe_v2(test_size)
+        self.bigquery.upload(df, self.destination_table + test_id)
+
+        chunks = list(self.bigquery.query_iter(
+            "SELECT * FROM {0}".format(
+                self.destination_table + test_id), strict=False, chunksize=3))
+
+        assert [len(chunk) for chunk in chunks] == [3, 3, 3, 1]
+        assert list(chunks[0].columns) == list(df.columns)
+
+    def test_run_query_parallel_pages(self):
+        test_id = "10"
+        test_size = 100
+        df = make_mixed_dataframe_v2(test_size)
+        self.bigquery.upload(df, self.destination_table + test_id)
+
+        schema, pages = self.bigquery.jobs.query(
+            "SELECT ints FROM {0}".format(self.destination_table + test_id),
+            max_workers=4, page_size=7)
+
+        assert sum(len(page) for page in pages) == test_size
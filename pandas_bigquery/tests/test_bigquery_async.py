@@ -0,0 +1,140 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip('aiohttp')
+
+from pandas import DataFrame
+from pandas_bigquery.bigquery_async import AsyncBigquery
+from pandas_bigquery.exceptions import GenericGBQException, InvalidSchema, TableCreationError
+
+
+class FakeCredentials(object):
+    valid = True
+    token = 'token'
+
+
+class FakeSession(object):
+    credentials = FakeCredentials()
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def make_client(responses):
+    client = AsyncBigquery('project', session=FakeSession())
+    requests = []
+
+    async def request(method, url, missing_ok=False, **kwargs):
+        requests.append((method, url, kwargs))
+        return responses(method, url, kwargs)
+
+    client._request = request
+    return client, requests
+
+
+def test_query_pages():
+    schema = {'fields': [{'name': 'a', 'type': 'INTEGER'}]}
+    pages = {
+        None: {'jobComplete': True, 'schema': schema, 'totalRows': '3', 'pageToken': 'next',
+               'rows': [{'f': [{'v': '1'}]}, {'f': [{'v': '2'}]}]},
+        'next': {'jobComplete': True, 'schema': schema, 'totalRows': '3',
+                 'rows': [{'f': [{'v': '3'}]}]}
+    }
+
+    def responses(method, url, kwargs):
+        if method == 'POST':
+            return {'jobReference': {'jobId': 'job'}}
+        return pages[kwargs['params'].get('pageToken')]
+
+    client, requests = make_client(responses)
+    df = run(client.query('SELECT a', strict=False))
+
+    assert df['a'].tolist() == [1, 2, 3]
+    assert [r[0] for r in requests] == ['POST', 'GET', 'GET']
+
+
+def test_wait_raises_job_error():
+    def responses(method, url, kwargs):
+        return {'status': {'state': 'DONE', 'errorResult': {'reason': 'invalid', 'message': 'boom'}}}
+
+    client, _ = make_client(responses)
+    with pytest.raises(GenericGBQException):
+        run(client.wait('job'))
+
+
+def test_upload_fails_on_existing_table():
+    client, _ = make_client(lambda method, url, kwargs: {})
+    with pytest.raises(TableCreationError):
+        run(client.upload(DataFrame({'a': [1]}), 'dataset.table', if_exists='fail'))
+
+
+def test_upload_rejects_invalid_method():
+    client, _ = make_client(lambda method, url, kwargs: {})
+    with pytest.raises(ValueError):
+        run(client.upload(DataFrame({'a': [1]}), 'dataset.table', method='copy'))
+
+
+def test_upload_file_in_chunks(tmpdir):
+    source = tmpdir.join('rows.json.gz')
+    source.write_binary(b'x' * 25)
+    client = AsyncBigquery('project', session=FakeSession())
+    client.upload_chunksize = 10
+    received = []
+
+    async def raw_request(method, url, missing_ok=False, headers=None, data=None, **kwargs):
+        received.append(headers['Content-Range'])
+        start = int(headers['Content-Range'].split(' ')[1].split('-')[0])
+        if start + len(data) == 25:
+            return 200, {}, {'jobReference': {'jobId': 'job'}}
+        # the first chunk is only partially persisted
+        persisted = start + (len(data) if start else 4)
+        return 308, {'Range': 'bytes=0-{0}'.format(persisted - 1)}, {}
+
+    client._raw_request = raw_request
+    job = run(client._upload_file('https://upload', str(source)))
+
+    assert job == {'jobReference': {'jobId': 'job'}}
+    assert received == ['bytes 0-9/25', 'bytes 4-13/25', 'bytes 14-23/25', 'bytes 24-24/25']
+
+
+def test_load_creates_missing_dataset():
+    def responses(method, url, kwargs):
+        if method == 'GET':
+            return None
+        return {}
+
+    client, requests = make_client(responses)
+    loaded = []
+
+    async def load(*args):
+        loaded.append(args)
+
+    client._load = load
+    run(client.upload(DataFrame({'a': [1]}), 'dataset.table', method='load'))
+
+    assert ('POST', '/projects/project/datasets') in [r[:2] for r in requests]
+    assert len(loaded) == 1
+
+
+def test_append_checks_the_schema():
+    def responses(method, url, kwargs):
+        return {'schema': {'fields': [{'name': 'b', 'type': 'STRING'}]}}
+
+    client, _ = make_client(responses)
+    with pytest.raises(InvalidSchema):
+        run(client.upload(DataFrame({'a': [1]}), 'dataset.table', if_exists='append'))
+
+
+def test_partition_of_an_unpartitioned_table():
+    def responses(method, url, kwargs):
+        return {'schema': {'fields': [{'name': 'a', 'type': 'INTEGER'}]}}
+
+    client, _ = make_client(responses)
+    with pytest.raises(InvalidSchema):
+        run(client.upload(DataFrame({'a': [1]}), 'dataset.table$20170101', if_exists='append'))
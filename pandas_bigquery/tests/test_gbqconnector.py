@@ -0,0 +1,147 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+from pandas_bigquery import gbqconnector
+from pandas_bigquery.exceptions import GenericGBQException
+
+DOCUMENT = json.dumps({'name': 'bigquery', 'version': 'v2', 'resources': {}})
+
+
+@pytest.fixture
+def offline(monkeypatch):
+    # no bundled document and no discovery service
+    discovery_cache = pytest.importorskip('googleapiclient.discovery_cache')
+    monkeypatch.setattr(discovery_cache, 'get_static_doc', lambda api, version: None, raising=False)
+    monkeypatch.setattr(gbqconnector, '_discovery_documents', {})
+    fetched = []
+
+    def fetch():
+        fetched.append(True)
+        return DOCUMENT
+
+    monkeypatch.setattr(gbqconnector, '_fetch_discovery_document', fetch)
+    return fetched
+
+
+class TestDiscoveryDocument(object):
+    def test_fetched_once_then_cached_on_disk(self, offline, tmpdir, monkeypatch):
+        cache_dir = str(tmpdir.join('cache'))
+
+        assert gbqconnector._get_discovery_document(cache_dir, 60) == DOCUMENT
+        assert os.path.exists(os.path.join(cache_dir, 'bigquery.v2.json'))
+
+        monkeypatch.setattr(gbqconnector, '_discovery_documents', {})
+        assert gbqconnector._get_discovery_document(cache_dir, 60) == DOCUMENT
+        assert len(offline) == 1
+
+    def test_invalid_cached_document_is_fetched_again(self, offline, tmpdir):
+        cache_dir = str(tmpdir)
+        tmpdir.join('bigquery.v2.json').write(json.dumps({'name': 'bigquery', 'version': 'v1'}))
+
+        assert gbqconnector._get_discovery_document(cache_dir, 60) == DOCUMENT
+        assert len(offline) == 1
+
+    def test_outdated_document_is_used_when_offline(self, offline, tmpdir, monkeypatch):
+        cache_dir = str(tmpdir)
+        tmpdir.join('bigquery.v2.json').write(DOCUMENT)
+        os.utime(os.path.join(cache_dir, 'bigquery.v2.json'), (0, 0))
+
+        def fail():
+            raise IOError('offline')
+
+        monkeypatch.setattr(gbqconnector, '_fetch_discovery_document', fail)
+
+        assert gbqconnector._get_discovery_document(cache_dir, 60) == DOCUMENT
+
+
+class TestPrefetch(object):
+    def test_producer_runs_ahead_by_at_most_max_pending(self):
+        produced = []
+
+        def pages():
+            for page in range(100):
+                produced.append(page)
+                yield page
+
+        consumer = gbqconnector.GbqConnector.prefetch(pages(), 3)
+        assert next(consumer) == 0
+        time.sleep(0.3)
+
+        # the consumed page, the queued ones and the one waiting to be queued
+        assert len(produced) <= 5
+        assert list(consumer) == list(range(1, 100))
+
+    def test_producer_errors_are_raised_by_the_consumer(self):
+        def pages():
+            yield 0
+            yield 1
+            raise IOError('connection reset')
+
+        consumer = gbqconnector.GbqConnector.prefetch(pages(), 10)
+
+        assert next(consumer) == 0
+        assert next(consumer) == 1
+        with pytest.raises(IOError):
+            next(consumer)
+
+    def test_producer_threads_are_reused(self):
+        threads = []
+
+        def pages():
+            threads.append(threading.current_thread())
+            yield 0
+
+        for _ in range(3):
+            assert list(gbqconnector.GbqConnector.prefetch(pages(), 2)) == [0]
+            # the thread goes back to the idle ones right after its producer
+            time.sleep(0.05)
+
+        assert threads[0] is not threading.current_thread()
+        assert len(set(threads)) == 1
+
+    def test_producer_stops_when_the_consumer_closes(self):
+        produced = []
+        closed = []
+
+        def pages():
+            try:
+                for page in range(100):
+                    produced.append(page)
+                    yield page
+            finally:
+                closed.append(True)
+
+        consumer = gbqconnector.GbqConnector.prefetch(pages(), 2)
+        assert next(consumer) == 0
+        consumer.close()
+
+        assert closed == [True]
+        assert len(produced) < 100
+
+
+class TestFetchRanges(object):
+    def test_short_pages_are_completed_in_order(self, make_connector):
+        requests = []
+
+        def fetch_page(service, start_index, max_results):
+            requests.append((start_index, max_results))
+            # the API may return fewer rows than requested
+            time.sleep(0.001 * (start_index % 7))
+            return list(range(start_index, start_index + min(max_results, 3)))
+
+        pages = list(make_connector(gbqconnector.GbqConnector, object()).fetch_ranges(fetch_page, 5, 47, 10, 3))
+
+        assert [len(page) for page in pages] == [10, 10, 10, 10, 2]
+        assert [row for page in pages for row in page] == list(range(5, 47))
+        # the rest of a partial page is requested from where it stopped
+        assert (5, 10) in requests and (8, 7) in requests and (11, 4) in requests
+
+    def test_empty_page_raises(self, make_connector):
+        def fetch_page(service, start_index, max_results):
+            return [] if start_index >= 20 else list(range(start_index, start_index + max_results))
+
+        with pytest.raises(GenericGBQException):
+            list(make_connector(gbqconnector.GbqConnector, object()).fetch_ranges(fetch_page, 0, 30, 10, 2))
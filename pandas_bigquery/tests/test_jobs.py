@@ -0,0 +1,28 @@
+import gzip
+import json
+
+import numpy as np
+from pandas import DataFrame
+from pandas_bigquery.jobs import Jobs
+
+
+class TestLoadFile(object):
+    def test_write_json_lines(self, tmpdir):
+        df = DataFrame({'ints': np.arange(25), 'flts': np.arange(25) / 2.})
+        df.loc[3, 'flts'] = np.nan
+        path = str(tmpdir.join('rows.json.gz'))
+
+        Jobs.write_load_file(df, path, chunksize=10)
+
+        with gzip.open(path) as f:
+            rows = [json.loads(line) for line in f.read().decode('utf-8').splitlines()]
+        assert [row['ints'] for row in rows] == list(range(25))
+        assert rows[3]['flts'] is None
+
+    def test_write_empty_frame(self, tmpdir):
+        path = str(tmpdir.join('rows.json.gz'))
+
+        Jobs.write_load_file(DataFrame({'ints': []}), path)
+
+        with gzip.open(path) as f:
+            assert f.read() == b''
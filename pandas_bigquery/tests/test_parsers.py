@@ -0,0 +1,296 @@
+import gc
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+import numpy as np
+import pandas as pd
+from pandas_bigquery import Bigquery
+from pandas_bigquery import parsers
+
+
+class TestParseData(object):
+    schema = {'fields': [{'name': 'bools', 'type': 'BOOLEAN'},
+                         {'name': 'flts', 'type': 'FLOAT'},
+                         {'name': 'ints', 'type': 'INTEGER'},
+                         {'name': 'strs', 'type': 'STRING'},
+                         {'name': 'times', 'type': 'TIMESTAMP'}]}
+
+    rows = [{'f': [{'v': 'true'}, {'v': '1.5'}, {'v': '3'},
+                   {'v': 'a'}, {'v': '1.4E9'}]},
+            {'f': [{'v': None}, {'v': None}, {'v': None},
+                   {'v': None}, {'v': None}]},
+            {'f': [{'v': 'false'}, {'v': '-2.0'}, {'v': '-7'},
+                   {'v': 'b'}, {'v': '1.234567891E9'}]}]
+
+    def test_parse_data_without_nulls(self):
+        df = Bigquery._parse_data(self.schema, [self.rows[0], self.rows[2]])
+
+        assert df['bools'].dtype == bool
+        assert df['ints'].dtype == np.int64
+        assert list(df['bools']) == [True, False]
+        assert list(df['flts']) == [1.5, -2.0]
+        assert list(df['ints']) == [3, -7]
+        assert list(df['strs']) == ['a', 'b']
+        assert df['times'][1] == np.datetime64('2009-02-13T23:31:31')
+
+    def test_parse_data_with_nulls(self):
+        df = Bigquery._parse_data(self.schema, self.rows)
+
+        assert df['bools'][1] is None
+        assert np.isnan(df['flts'][1])
+        assert df['ints'][1] is None
+        assert df['ints'][2] == -7
+        assert df['strs'].isnull()[1]
+        assert df['times'].isnull().tolist() == [False, True, False]
+
+    def test_parse_data_matches_parse_entry(self):
+        df = Bigquery._parse_data(self.schema, self.rows)
+
+        for row_num, row in enumerate(self.rows):
+            for field, entry in zip(self.schema['fields'], row['f']):
+                expected = Bigquery._parse_entry(entry['v'], field['type'])
+                actual = df[field['name']][row_num]
+                if expected is None:
+                    assert actual is None or actual != actual
+                else:
+                    assert actual == expected
+
+    def test_parse_data_empty(self):
+        df = Bigquery._parse_data(self.schema, [])
+
+        assert list(df.columns) == ['bools', 'flts', 'ints', 'strs', 'times']
+        assert len(df) == 0
+
+
+class TestResultBuffer(object):
+    schema = {'fields': [{'name': 'ints', 'type': 'INTEGER'},
+                         {'name': 'flts', 'type': 'FLOAT'}]}
+
+    @staticmethod
+    def _page(start, stop, null_at=None):
+        return [{'f': [{'v': None if i == null_at else str(i)},
+                       {'v': str(i / 2.0)}]}
+                for i in range(start, stop)]
+
+    def test_pages_are_written_in_order(self):
+        result = parsers.ResultBuffer(self.schema, 25)
+        for start in range(0, 25, 10):
+            result.append(self._page(start, min(start + 10, 25)))
+        df = result.to_dataframe()
+
+        assert df['ints'].dtype == np.int64
+        assert list(df['ints']) == list(range(25))
+        assert list(df['flts']) == [i / 2.0 for i in range(25)]
+
+    def test_null_in_a_later_page(self):
+        result = parsers.ResultBuffer(self.schema, 20)
+        result.append(self._page(0, 10))
+        result.append(self._page(10, 20, null_at=15))
+        df = result.to_dataframe()
+
+        assert df['ints'][15] is None
+        assert df['ints'][16] == 16
+
+    def test_columns_are_not_copied(self):
+        result = parsers.ResultBuffer(self.schema, 10)
+        result.append(self._page(0, 10))
+        df = result.to_dataframe()
+
+        assert np.shares_memory(df['flts'].values, result._columns[1])
+
+    def test_too_many_rows(self):
+        result = parsers.ResultBuffer(self.schema, 5)
+
+        with pytest.raises(ValueError):
+            result.append(self._page(0, 10))
+
+
+class TestNullableDtypes(object):
+    schema = TestParseData.schema
+    rows = TestParseData.rows
+
+    def test_nullable_dtypes(self):
+        df = Bigquery._parse_data(self.schema, self.rows, dtypes='nullable')
+
+        assert str(df['ints'].dtype) == 'Int64'
+        assert str(df['bools'].dtype) == 'boolean'
+        assert str(df['strs'].dtype) == 'string'
+        assert df['ints'].isnull().tolist() == [False, True, False]
+        assert df['ints'][2] == -7
+        assert df['bools'][0]
+        assert df['strs'][2] == 'b'
+
+    def test_invalid_dtypes(self):
+        with pytest.raises(ValueError):
+            Bigquery._parse_data(self.schema, self.rows, dtypes='numpy')
+
+
+class TestCategorical(object):
+    schema = {'fields': [{'name': 'country', 'type': 'STRING'},
+                         {'name': 'event', 'type': 'STRING'}]}
+
+    @staticmethod
+    def _page(values):
+        return [{'f': [{'v': value}, {'v': value}]} for value in values]
+
+    def test_dictionaries_are_merged_across_pages(self):
+        result = parsers.ResultBuffer(self.schema, 6, categorical=['country'])
+        result.append(self._page(['dk', 'it', None]))
+        result.append(self._page(['it', 'us', 'dk']))
+        df = result.to_dataframe()
+
+        assert df['country'].dtype.name == 'category'
+        assert list(df['country'].cat.categories) == ['dk', 'it', 'us']
+        assert df['country'].isnull().tolist() == [False, False, True,
+                                                   False, False, False]
+        assert list(df['country'][3:]) == ['it', 'us', 'dk']
+        assert df['event'].dtype.name != 'category'
+
+    def test_threshold_falls_back_to_strings(self):
+        result = parsers.ResultBuffer(self.schema, 6, categorical=['country'],
+                                      categorical_threshold=2)
+        result.append(self._page(['dk', 'it', None]))
+        result.append(self._page(['it', 'us', 'dk']))
+        df = result.to_dataframe()
+
+        assert df['country'].dtype.name == 'category'
+        assert df['event'].dtype.name != 'category'
+        assert list(df['event'][:2]) == ['dk', 'it']
+        assert df['event'].isnull()[2]
+        assert list(df['event'][3:]) == ['it', 'us', 'dk']
+
+    def test_threshold_keeps_low_cardinality_columns(self):
+        df = Bigquery._parse_data(self.schema, self._page(['dk', 'dk', 'it']),
+                                  categorical_threshold=2)
+
+        assert df['event'].dtype.name == 'category'
+
+    def test_only_string_columns(self):
+        with pytest.raises(ValueError):
+            parsers.ResultBuffer({'fields': [{'name': 'n', 'type': 'FLOAT'}]},
+                                 1, categorical=['n'])
+
+
+class TestExtendedTypes(object):
+    schema = {'fields': [
+        {'name': 'day', 'type': 'DATE'},
+        {'name': 'moment', 'type': 'DATETIME'},
+        {'name': 'clock', 'type': 'TIME'},
+        {'name': 'amount', 'type': 'NUMERIC'},
+        {'name': 'user', 'type': 'RECORD', 'fields': [
+            {'name': 'id', 'type': 'INTEGER'},
+            {'name': 'device', 'type': 'RECORD', 'fields': [
+                {'name': 'os', 'type': 'STRING'}]}]},
+        {'name': 'scores', 'type': 'INTEGER', 'mode': 'REPEATED'}]}
+
+    rows = [{'f': [{'v': '2017-11-02'},
+                   {'v': '2017-11-02T10:20:30.5'},
+                   {'v': '10:20:30'},
+                   {'v': '12.50'},
+                   {'v': {'f': [{'v': '42'}, {'v': {'f': [{'v': 'ios'}]}}]}},
+                   {'v': [{'v': '1'}, {'v': '2'}]}]},
+            {'f': [{'v': None}, {'v': None}, {'v': None}, {'v': None},
+                   {'v': None}, {'v': []}]}]
+
+    def test_dates_and_times(self):
+        df = Bigquery._parse_data(self.schema, self.rows)
+
+        assert df['day'][0] == np.datetime64('2017-11-02')
+        assert df['moment'][0] == np.datetime64('2017-11-02T10:20:30.5')
+        assert df['clock'][0] == np.timedelta64(37230, 's')
+        assert df[['day', 'moment', 'clock']].isnull().values[1].all()
+
+    def test_numeric(self):
+        df = Bigquery._parse_data(self.schema, self.rows)
+        assert df['amount'].dtype == float
+        assert df['amount'][0] == 12.5
+
+        df = Bigquery._parse_data(self.schema, self.rows, numeric='decimal')
+        assert df['amount'][0] == Decimal('12.50')
+
+    def test_records_are_flattened(self):
+        df = Bigquery._parse_data(self.schema, self.rows)
+
+        assert list(df.columns) == ['day', 'moment', 'clock', 'amount',
+                                    'user.id', 'user.device.os', 'scores']
+        assert df['user.id'][0] == 42
+        assert df['user.device.os'][0] == 'ios'
+        assert df[['user.id', 'user.device.os']].isnull().values[1].all()
+
+    def test_repeated(self):
+        df = Bigquery._parse_data(self.schema, self.rows)
+
+        assert list(df['scores'][0]) == [1, 2]
+        assert len(df['scores'][1]) == 0
+
+    def test_dates_out_of_range(self):
+        df = Bigquery._parse_data({'fields': [{'name': 'day', 'type': 'DATE'},
+                                              {'name': 'moment', 'type': 'DATETIME'}]},
+                                  [{'f': [{'v': '2020-01-01'}, {'v': '2020-01-01T10:00:00'}]},
+                                   {'f': [{'v': '9999-12-31'}, {'v': '0001-01-01T00:00:00'}]},
+                                   {'f': [{'v': None}, {'v': None}]}])
+
+        # recent pandas versions infer a datetime64[us] column from the objects
+        assert [None if pd.isnull(day) else day for day in df['day']] == \
+            [date(2020, 1, 1), date(9999, 12, 31), None]
+        assert [None if pd.isnull(moment) else moment for moment in df['moment']] == \
+            [datetime(2020, 1, 1, 10), datetime(1, 1, 1), None]
+
+    def test_timestamps_out_of_range(self):
+        df = Bigquery._parse_data({'fields': [{'name': 'at', 'type': 'TIMESTAMP'}]},
+                                  [{'f': [{'v': '1.5E9'}]},
+                                   {'f': [{'v': '2.53402300799E11'}]},
+                                   {'f': [{'v': None}]}])
+
+        assert [None if pd.isnull(at) else at for at in df['at']] == \
+            [datetime(2017, 7, 14, 2, 40), datetime(9999, 12, 31, 23, 59, 59), None]
+
+    def test_dates_out_of_range_in_a_later_page(self):
+        result = parsers.ResultBuffer({'fields': [{'name': 'day', 'type': 'DATE'}]}, 3)
+        result.append([{'f': [{'v': '2020-01-01'}]}])
+        result.append([{'f': [{'v': '9999-12-31'}]}])
+        result.append([{'f': [{'v': '2020-01-02'}]}])
+
+        assert list(result.to_dataframe()['day']) == \
+            [date(2020, 1, 1), date(9999, 12, 31), date(2020, 1, 2)]
+
+
+class TestSpill(object):
+    schema = {'fields': [{'name': 'ints', 'type': 'INTEGER'},
+                         {'name': 'flts', 'type': 'FLOAT'},
+                         {'name': 'strs', 'type': 'STRING'}]}
+
+    @staticmethod
+    def _page(start, stop):
+        return [{'f': [{'v': str(i)}, {'v': str(i / 2.0)}, {'v': str(i)}]}
+                for i in range(start, stop)]
+
+    def test_columns_are_memory_mapped(self, tmpdir):
+        result = parsers.ResultBuffer(self.schema, 20, spill_dir=str(tmpdir))
+        result.append(self._page(0, 10))
+        result.append(self._page(10, 20))
+        df = result.to_dataframe()
+
+        assert isinstance(result._columns[1], np.memmap)
+        assert np.shares_memory(df['flts'].values, result._columns[1])
+        assert list(df['ints']) == list(range(20))
+        assert list(df['strs']) == [str(i) for i in range(20)]
+        assert len(tmpdir.listdir()) > 0
+
+    def test_spill_files_are_removed(self, tmpdir):
+        result = parsers.ResultBuffer(self.schema, 10, spill_dir=str(tmpdir))
+        result.append(self._page(0, 10))
+        df = result.to_dataframe()
+
+        del result, df
+        gc.collect()
+
+        assert tmpdir.listdir() == []
+
+    def test_below_threshold_stays_in_memory(self, tmpdir):
+        result = parsers.ResultBuffer(self.schema, 10, spill_dir=str(tmpdir),
+                                      spill_threshold=2 ** 20)
+
+        assert not isinstance(result._columns[1], np.memmap)
+        assert tmpdir.listdir() == []
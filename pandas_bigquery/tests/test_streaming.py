@@ -0,0 +1,72 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+from pandas import DataFrame
+from pandas_bigquery.streaming import StreamingWriter
+
+
+class FakeTabledata(object):
+    def __init__(self, delay=0., error=None):
+        self.delay = delay
+        self.error = error
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def insert_all(self, dataframe, dataset_id, table_id, **kwargs):
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        with self.lock:
+            self.batches.append(dataframe)
+        return []
+
+
+def make_frame(num_rows):
+    return DataFrame({'ints': np.arange(num_rows), 'strs': ['x' * 10] * num_rows})
+
+
+class TestStreamingWriter(object):
+    def test_batches_by_rows(self):
+        tabledata = FakeTabledata()
+
+        with StreamingWriter(tabledata, 'dataset', 'table', batch_rows=250, linger=60) as writer:
+            writer.write_all(make_frame(100) for _ in range(10))
+
+        # batches are sent concurrently and may complete in any order
+        assert sorted(len(batch) for batch in tabledata.batches) == [100, 300, 300, 300]
+        assert writer.stats['rows'] == 1000
+        assert writer.stats['batches'] == 4
+
+    def test_linger_sends_partial_batches(self):
+        tabledata = FakeTabledata()
+        writer = StreamingWriter(tabledata, 'dataset', 'table', linger=0.05)
+
+        writer.write(make_frame(10))
+        time.sleep(0.5)
+
+        assert [len(batch) for batch in tabledata.batches] == [10]
+        writer.close()
+
+    def test_buffer_cap_blocks_writers(self):
+        tabledata = FakeTabledata(delay=0.01)
+        frame = make_frame(100)
+        frame_bytes = frame.memory_usage(index=True, deep=True).sum()
+
+        with StreamingWriter(tabledata, 'dataset', 'table', batch_rows=100, max_workers=8,
+                             max_buffer_bytes=frame_bytes * 2) as writer:
+            for _ in range(20):
+                writer.write(frame)
+                assert writer.stats['buffered_bytes'] <= frame_bytes * 2
+
+        assert sum(len(batch) for batch in tabledata.batches) == 2000
+
+    def test_errors_are_raised_on_flush(self):
+        writer = StreamingWriter(FakeTabledata(error=RuntimeError('failed')), 'dataset', 'table')
+
+        writer.write(make_frame(10))
+
+        with pytest.raises(RuntimeError):
+            writer.flush()
+        writer.close()
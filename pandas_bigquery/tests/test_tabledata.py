@@ -0,0 +1,194 @@
+import json
+
+import numpy as np
+import pytest
+from pandas import DataFrame
+from pandas_bigquery import tabledata
+from pandas_bigquery.exceptions import StreamingInsertError
+from pandas_bigquery.tabledata import Tabledata
+
+
+class TestChunking(object):
+    def test_serialize_rows(self):
+        df = DataFrame({'ints': [1, 2], 'flts': [0.5, np.nan]}, index=[7, 3])
+
+        rows = Tabledata.serialize_rows(df, 'job', 10)
+
+        assert rows == [{'json': {'ints': 1, 'flts': 0.5}, 'insertId': 'job10'},
+                        {'json': {'ints': 2, 'flts': None}, 'insertId': 'job11'}]
+
+    def test_narrow_frames_use_max_rows(self):
+        df = DataFrame({'ints': np.arange(2500)})
+
+        chunks = list(Tabledata.iter_chunks(df, 'job', 1000, 2 ** 20))
+
+        assert [start for start, _ in chunks] == [0, 1000, 2000]
+        assert [len(rows) for _, rows in chunks] == [1000, 1000, 500]
+
+    def test_wide_frames_stay_below_max_bytes(self):
+        df = DataFrame({'strs': ['x' * 1000] * 500, 'ints': np.arange(500)})
+        max_bytes = 50000
+
+        chunks = list(Tabledata.iter_chunks(df, 'job', 500, max_bytes))
+
+        assert all(len(json.dumps(rows)) <= max_bytes for _, rows in chunks)
+        insert_ids = [row['insertId'] for _, rows in chunks for row in rows]
+        assert insert_ids == ['job' + str(i) for i in range(500)]
+
+    def test_oversized_rows_are_sent_alone(self):
+        df = DataFrame({'strs': ['x' * 1000] * 3})
+
+        chunks = list(Tabledata.iter_chunks(df, 'job', 500, 10))
+
+        assert [len(rows) for _, rows in chunks] == [1, 1, 1]
+
+    def test_hashed_insert_ids_are_deterministic(self):
+        df = DataFrame({'ints': [1, 1, 2], 'strs': ['a', 'a', 'b']})
+
+        first = Tabledata.serialize_rows(df, '', insert_ids='hash')
+        second = Tabledata.serialize_rows(df.copy(), '', insert_ids='hash')
+
+        assert [row['insertId'] for row in first] == [row['insertId'] for row in second]
+        assert len(set(row['insertId'] for row in first)) == 3
+
+    def test_key_column_insert_ids(self):
+        df = DataFrame({'key': ['x', 'y'], 'ints': [1, 2]})
+
+        rows = Tabledata.serialize_rows(df, 'job', insert_ids='key')
+
+        assert [row['insertId'] for row in rows] == ['jobx', 'joby']
+
+    def test_chunks_start_after_checkpoint(self):
+        df = DataFrame({'ints': np.arange(10)})
+
+        chunks = list(Tabledata.iter_chunks(df, 'job', 4, 2 ** 20, start=6))
+
+        assert [start for start, _ in chunks] == [6]
+        assert [row['json']['ints'] for row in chunks[0][1]] == [6, 7, 8, 9]
+
+
+class TestCheckpoint(object):
+    def test_checkpoint_round_trip(self, tmpdir):
+        checkpoint = str(tmpdir.join('upload.json'))
+
+        assert Tabledata._read_checkpoint(checkpoint, 'dataset', 'table', 10) == 0
+
+        Tabledata._write_checkpoint(checkpoint, 'dataset', 'table', 10, 4)
+
+        assert Tabledata._read_checkpoint(checkpoint, 'dataset', 'table', 10) == 4
+
+    def test_checkpoint_of_another_upload(self, tmpdir):
+        checkpoint = str(tmpdir.join('upload.json'))
+        Tabledata._write_checkpoint(checkpoint, 'dataset', 'table', 10, 4)
+
+        with pytest.raises(ValueError):
+            Tabledata._read_checkpoint(checkpoint, 'dataset', 'other', 10)
+
+    def test_checkpoint_needs_insert_ids(self, tmpdir, make_connector):
+        client = make_connector(Tabledata, FakeInsertAll([]))
+
+        with pytest.raises(ValueError):
+            client.insert_all(DataFrame({'ints': [1]}), 'dataset', 'table',
+                              checkpoint=str(tmpdir.join('upload.json')))
+        assert client.service.requests == []
+
+
+def http_error(status):
+    httplib2 = pytest.importorskip('httplib2')
+    errors = pytest.importorskip('googleapiclient.errors')
+    content = json.dumps({'error': {'errors': [{'reason': 'backendError', 'message': 'backendError'}]}})
+    return errors.HttpError(httplib2.Response({'status': status}), content.encode('utf-8'))
+
+
+class FakeInsertAll(object):
+    """ tabledata().insertAll(...).execute() answering with the scripted
+    responses, or raising the scripted errors, in order """
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def tabledata(self):
+        return self
+
+    def insertAll(self, projectId, datasetId, tableId, body):
+        self.requests.append(body['rows'])
+        return self
+
+    def execute(self):
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def insert_error(index, reason):
+    return {'index': index, 'errors': [{'reason': reason, 'message': reason, 'location': ''}]}
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    delays = []
+    monkeypatch.setattr(tabledata, 'sleep', delays.append)
+    return delays
+
+
+class TestInsertRetries(object):
+    df = DataFrame({'ints': np.arange(4)})
+
+    def test_only_retriable_rows_are_resent(self, delays, make_connector):
+        client = make_connector(Tabledata, FakeInsertAll([
+            {'insertErrors': [insert_error(1, 'backendError'), insert_error(3, 'stopped')]},
+            {'insertErrors': [insert_error(0, 'timeout')]},
+            {}]))
+
+        assert client.insert_all(self.df, 'dataset', 'table', insert_ids='hash', max_retries=2) == []
+
+        first, second, third = client.service.requests
+        assert [row['json']['ints'] for row in second] == [1, 3]
+        assert [row['insertId'] for row in second] == [first[1]['insertId'], first[3]['insertId']]
+        assert [row['insertId'] for row in third] == [first[1]['insertId']]
+
+    def test_backoff_is_exponential(self, delays, make_connector):
+        client = make_connector(Tabledata, FakeInsertAll([{'insertErrors': [insert_error(0, 'backendError')]}] * 3 + [{}]))
+
+        client.insert_all(self.df, 'dataset', 'table', max_retries=3, retry_delay=0.5)
+
+        assert delays == [0.5, 1., 2.]
+
+    def test_chunk_resent_whole_on_server_error(self, delays, make_connector):
+        client = make_connector(Tabledata, FakeInsertAll([http_error(503), {}]))
+
+        client.insert_all(self.df, 'dataset', 'table', max_retries=1)
+
+        first, second = client.service.requests
+        assert first == second
+
+    def test_server_error_raised_once_retries_are_exhausted(self, delays, make_connector):
+        client = make_connector(Tabledata, FakeInsertAll([http_error(503), http_error(503)]))
+
+        with pytest.raises(Exception):
+            client.insert_all(self.df, 'dataset', 'table', max_retries=1)
+        assert len(client.service.requests) == 2
+
+    def test_invalid_rows_are_not_resent(self, delays, make_connector):
+        client = make_connector(Tabledata, FakeInsertAll([{'insertErrors': [insert_error(2, 'invalid')]}]))
+
+        with pytest.raises(StreamingInsertError):
+            client.insert_all(self.df, 'dataset', 'table', max_retries=3)
+        assert len(client.service.requests) == 1
+
+    def test_dead_letters_reported(self, delays, make_connector):
+        client = make_connector(Tabledata, FakeInsertAll([
+            {'insertErrors': [insert_error(0, 'invalid'), insert_error(1, 'backendError')]},
+            {'insertErrors': [insert_error(0, 'backendError')]},
+            {'insertErrors': [insert_error(0, 'invalid')]}]))
+        df = DataFrame({'ints': np.arange(4)})
+
+        dead_letters = client.insert_all(df, 'dataset', 'table', chunksize=2, max_retries=1,
+                                         errors='report')
+
+        assert [letter['index'] for letter in dead_letters] == [0, 1, 2]
+        assert [letter['json']['ints'] for letter in dead_letters] == [0, 1, 2]
+        assert dead_letters[1]['errors'][0]['reason'] == 'backendError'
+        assert dead_letters[1]['insertId'] == client.service.requests[0][1]['insertId']
@@ -0,0 +1,118 @@
+import json
+
+import pytest
+from pandas_bigquery.exceptions import GenericGBQException
+from pandas_bigquery.tables import Tables
+
+httplib2 = pytest.importorskip('httplib2')
+errors = pytest.importorskip('googleapiclient.errors')
+
+
+def http_error(status, reason):
+    content = json.dumps({'error': {'errors': [{'reason': reason, 'message': reason}]}})
+    return errors.HttpError(httplib2.Response({'status': status}), content.encode('utf-8'))
+
+
+class FakeRequest(object):
+    def __init__(self, method, table_id):
+        self.method = method
+        self.table_id = table_id
+
+
+class FakeBatch(object):
+    def __init__(self, service, callback):
+        self.service = service
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request, request_id))
+
+    def execute(self):
+        self.service.batches.append(len(self.requests))
+        for request, request_id in self.requests:
+            outcome = self.service.outcomes.get(request.table_id, {'id': request.table_id})
+            if isinstance(outcome, Exception):
+                self.callback(request_id, None, outcome)
+            else:
+                self.callback(request_id, outcome, None)
+
+
+class FakeService(object):
+    def __init__(self, outcomes=None):
+        self.outcomes = outcomes or {}
+        self.batches = []
+
+    def tables(self):
+        return self
+
+    def get(self, projectId, datasetId, tableId):
+        return FakeRequest('get', tableId)
+
+    def delete(self, projectId, datasetId, tableId):
+        return FakeRequest('delete', tableId)
+
+    def new_batch_http_request(self, callback):
+        return FakeBatch(self, callback)
+
+
+class TestBatchRequests(object):
+    def test_requests_split_by_batch_size(self, make_connector):
+        service = FakeService()
+        tables = make_connector(Tables, service)
+        tables.batch_size = 2
+        table_ids = ['t{0}'.format(i) for i in range(5)]
+
+        result = tables.get_many('dataset', table_ids)
+
+        assert service.batches == [2, 2, 1]
+        assert result == dict((table_id, {'id': table_id}) for table_id in table_ids)
+
+    def test_exists_many_maps_not_found(self, make_connector):
+        service = FakeService({'missing': http_error(404, 'notFound')})
+        tables = make_connector(Tables, service)
+
+        assert tables.exists_many('dataset', ['table', 'missing', 'table$20170101']) == \
+            {'table': True, 'missing': False, 'table$20170101': True}
+
+    def test_errors_raised_after_every_request(self, make_connector):
+        service = FakeService({'a': http_error(403, 'accessDenied')})
+        tables = make_connector(Tables, service)
+
+        with pytest.raises(GenericGBQException):
+            tables.delete_many('dataset', ['a', 'b'])
+
+        assert service.batches == [2]
+
+    def test_errors_reported(self, make_connector):
+        service = FakeService({'a': http_error(403, 'accessDenied'),
+                               'b': http_error(404, 'notFound')})
+        tables = make_connector(Tables, service)
+
+        result = tables.delete_many('dataset', ['a', 'b', 'c'], errors='report')
+
+        assert isinstance(result['a'], GenericGBQException)
+        assert result['b'] is False
+        assert result['c'] is True
+
+    def test_get_many_not_found_is_an_error(self, make_connector):
+        service = FakeService({'missing': http_error(404, 'notFound')})
+        tables = make_connector(Tables, service)
+
+        result = tables.get_many('dataset', ['missing'], errors='report')
+
+        assert isinstance(result['missing'], GenericGBQException)
+
+    def test_partition_exists_many_counts_streamed_rows(self, make_connector):
+        service = FakeService({'t$20170101': {'numRows': '10'},
+                               't$20170102': {'numRows': '0', 'streamingBuffer': {'estimatedRows': '3'}},
+                               't$20170103': {'numRows': '0'},
+                               't$20170104': http_error(404, 'notFound')})
+        tables = make_connector(Tables, service)
+
+        assert tables.partition_exists_many('dataset', ['t$20170101', 't$20170102', 't$20170103', 't$20170104']) == \
+            {'t$20170101': True, 't$20170102': True, 't$20170103': False, 't$20170104': False}
+
+    def test_partition_exists_many_needs_decorators(self, make_connector):
+        with pytest.raises(ValueError):
+            make_connector(Tables, FakeService()).partition_exists_many('dataset', ['t'])
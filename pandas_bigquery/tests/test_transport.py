@@ -0,0 +1,99 @@
+import threading
+import time
+from queue import Empty
+
+import pytest
+from pandas_bigquery.transport import HttpPool, build_http
+
+
+class FakeHttp(object):
+    def __init__(self):
+        self.in_use = False
+        self.connections = {}
+
+    def request(self, uri, method='GET', **kwargs):
+        assert not self.in_use
+        self.in_use = True
+        time.sleep(0.005)
+        self.in_use = False
+        if uri == 'error':
+            raise IOError('connection reset')
+        return {'status': '200'}, b'{}'
+
+
+class FakePool(HttpPool):
+    def __init__(self, *args, **kwargs):
+        super(FakePool, self).__init__(*args, **kwargs)
+        self.opened = []
+
+    def _open(self):
+        http = FakeHttp()
+        self.opened.append(http)
+        return http
+
+
+class TestHttpPool(object):
+    def test_connections_are_not_shared_between_threads(self):
+        pool = FakePool(credentials=None, size=3)
+
+        def send():
+            for _ in range(20):
+                pool.request('uri')
+
+        threads = [threading.Thread(target=send) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(pool.opened) == 3
+
+    def test_idle_connections_are_reused(self):
+        pool = FakePool(credentials=None, size=3)
+
+        pool.request('uri')
+        pool.request('uri')
+
+        assert len(pool.opened) == 1
+
+    def test_failed_connections_are_discarded(self):
+        pool = FakePool(credentials=None, size=1)
+
+        with pytest.raises(IOError):
+            pool.request('error')
+        pool.request('uri')
+
+        assert len(pool.opened) == 2
+
+    def test_waiting_thread_opens_a_connection_after_a_failure(self):
+        pool = FakePool(credentials=None, size=1)
+        http = pool.checkout()
+        sent = []
+
+        waiter = threading.Thread(target=lambda: sent.append(pool.request('uri')))
+        waiter.daemon = True
+        waiter.start()
+        time.sleep(0.05)
+
+        # the request of the first thread fails while the other one waits
+        pool.discard(http)
+        waiter.join(2)
+
+        assert not waiter.is_alive()
+        assert len(sent) == 1
+        assert len(pool.opened) == 2
+
+    def test_checkout_times_out_when_exhausted(self):
+        pool = FakePool(credentials=None, size=1)
+        pool.checkout()
+
+        with pytest.raises(Empty):
+            pool.checkout(timeout=0.01)
+
+
+def test_build_http_does_not_follow_resume_incomplete():
+    pytest.importorskip('httplib2')
+    http = build_http(timeout=5)
+
+    assert 308 not in getattr(http, 'redirect_codes', ())
+    assert http.timeout == 5
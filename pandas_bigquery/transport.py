@@ -0,0 +1,175 @@
+from queue import Empty
+from contextlib import contextmanager
+import threading
+import time
+
+
+def build_http(timeout=None):
+    """ An httplib2 connection suitable for resumable media uploads
+
+    httplib2 follows 308 responses as redirects, while resumable uploads
+    answer 308 Resume Incomplete, without a Location, to every chunk but
+    the last one.
+
+    Parameters
+    ----------
+    timeout : float
+        Socket timeout in seconds, None to wait forever
+
+    Returns
+    -------
+    httplib2.Http
+    """
+
+    import httplib2
+
+    http = httplib2.Http(timeout=timeout)
+    if hasattr(http, 'redirect_codes'):
+        http.redirect_codes = http.redirect_codes - {308}
+    return http
+
+
+class HttpPool(object):
+    """ Thread-safe pool of authorized httplib2 connections
+
+    httplib2.Http objects are not thread-safe. The pool hands each request
+    a connection of its own, checked out for the duration of the request
+    and checked back in afterwards, so a single service object built with
+    the pool as its http can be shared by any number of threads. At most
+    `size` connections are opened, requests wait for a free connection
+    beyond that. The most recently used connections are handed out first
+    so that their keep-alive sockets are reused.
+
+    Parameters
+    ----------
+    credentials : google.auth.credentials.Credentials
+        Credentials authorizing every connection
+    size : int
+        Maximum number of connections
+    timeout : float
+        Socket timeout of the connections in seconds, None to wait forever
+    """
+
+    def __init__(self, credentials, size=10, timeout=None):
+        if size < 1:
+            raise ValueError("'{0}' is not valid for size".format(size))
+
+        self.credentials = credentials
+        self.size = size
+        self.timeout = timeout
+        # idle connections, the most recently used last, and the number of
+        # connections open, guarded by a condition notified whenever a
+        # connection is returned or discarded
+        self._idle = []
+        self._opened = 0
+        self._condition = threading.Condition()
+
+    def checkout(self, timeout=None):
+        """ Take a connection out of the pool, opening one if none is idle
+        and fewer than `size` are open
+
+        Parameters
+        ----------
+        timeout : float
+            Seconds to wait for a connection, None to wait forever
+
+        Returns
+        -------
+        google_auth_httplib2.AuthorizedHttp
+            A connection to be returned with `checkin` or `discard`
+
+        Raises
+        ------
+        queue.Empty
+            When no connection is available within `timeout`
+        """
+
+        deadline = None if timeout is None else time.time() + timeout
+
+        with self._condition:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+                if self._opened < self.size:
+                    self._opened += 1
+                    break
+
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    raise Empty()
+                self._condition.wait(remaining)
+
+        try:
+            return self._open()
+        except Exception:
+            self._release()
+            raise
+
+    def checkin(self, http):
+        """ Return a connection taken with `checkout` to the pool """
+
+        with self._condition:
+            self._idle.append(http)
+            self._condition.notify()
+
+    def discard(self, http):
+        """ Close a connection taken with `checkout` instead of returning
+        it, making room for a new one """
+
+        self._release()
+        self._close(http)
+
+    @contextmanager
+    def connection(self):
+        """ Check a connection out for the duration of a with block """
+
+        http = self.checkout()
+        try:
+            yield http
+        except Exception:
+            self.discard(http)
+            raise
+        else:
+            self.checkin(http)
+
+    def request(self, *args, **kwargs):
+        """ Send a request on a pooled connection, see httplib2.Http.request
+
+        A connection raising an error is closed rather than reused, since
+        its socket may be left in an unknown state.
+        """
+
+        with self.connection() as http:
+            return http.request(*args, **kwargs)
+
+    def close(self):
+        """ Close the idle connections """
+
+        with self._condition:
+            idle, self._idle = self._idle, []
+        for http in idle:
+            self.discard(http)
+
+    def _release(self):
+        # a connection was closed or failed to open, a waiting thread may
+        # open a new one in its place
+        with self._condition:
+            self._opened -= 1
+            self._condition.notify()
+
+    def _open(self):
+        from google_auth_httplib2 import AuthorizedHttp
+
+        return AuthorizedHttp(self.credentials,
+                              http=build_http(self.timeout))
+
+    @staticmethod
+    def _close(http):
+        # AuthorizedHttp exposes the connections of the wrapped httplib2.Http
+        connections = getattr(getattr(http, 'http', http), 'connections', {})
+        for connection in list(connections.values()):
+            try:
+                connection.close()
+            except Exception:
+                pass
+        connections.clear()
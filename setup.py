@@ -19,6 +19,10 @@ INSTALL_REQUIRES = [
     'pyOpenSSL>=17.2.0'
 ]
 
+EXTRAS_REQUIRE = {
+    'async': ['aiohttp>=3.0']
+}
+
 setup(
     name='pandas-bigquery',
     version='0.9.2',
@@ -44,6 +48,7 @@ setup(
     ],
     keywords='data',
     install_requires=INSTALL_REQUIRES,
+    extras_require=EXTRAS_REQUIRE,
     packages=find_packages(exclude=['contrib', 'docs', 'tests*']),
     test_suite='tests',
 )